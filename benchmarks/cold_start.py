@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).parent / "cold_start_budget.json"
+
+# What each trigger loads and initializes on its first call after the host indexed function_app
+TRIGGERS = {
+    "InsertContentTimerTrigger": "import src.ingest; src.ingest._news_source(); src.ingest._trailers_source(); "
+                                 "from src.utils.youtube_client import get_youtube_client; get_youtube_client()",
+    "InsertWeatherTimerTrigger": "import src.weather.weather; from src.utils.http_client import get_session; get_session()",
+    "InsertRedditTimerTrigger": "import src.reddit.reddit_posts as r; r.get_reddit_client()",
+    "CompactContentTimerTrigger": "import src.utils.retention",
+    "HealthCheck": "from src.utils.db_connection import get_client; get_client()",
+    "DashboardItems": "import src.api.dashboard",
+    "DashboardSnapshot": "import src.api.snapshot",
+}
+
+# Runs in a fresh interpreter: time indexing function_app, then one trigger's first call
+PROBE = """
+import json, time
+start = time.perf_counter()
+import function_app
+indexed = time.perf_counter()
+{trigger}
+done = time.perf_counter()
+print(json.dumps({{"startup_ms": 1000 * (indexed - start), "first_call_ms": 1000 * (done - indexed)}}))
+"""
+
+# Dummy settings so clients can be constructed without contacting anything
+PROBE_ENV = {
+    "YOUTUBE_API_KEY": "cold-start", "REDDIT_CLIENT_ID": "cold-start", "REDDIT_CLIENT_SECRET": "cold-start",
+    "REDDIT_USER_AGENT": "cold-start", "COSMOS_DB_CONNECTION_STRING": "mongodb://localhost:27017",
+}
+
+
+def run_probe(trigger_code, preload=False):
+    env = dict(os.environ, **PROBE_ENV, PRELOAD_SOURCES="true" if preload else "false")
+    completed = subprocess.run([sys.executable, "-c", PROBE.format(trigger=trigger_code)], cwd=ROOT, env=env,
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure(runs, preload=False):
+    """Median startup and per-trigger first-call times over ``runs`` fresh processes."""
+    results = {}
+    for name, code in TRIGGERS.items():
+        samples = [run_probe(code, preload) for _ in range(runs)]
+        results[name] = {
+            "startup_ms": round(statistics.median(s["startup_ms"] for s in samples), 1),
+            "first_call_ms": round(statistics.median(s["first_call_ms"] for s in samples), 1),
+        }
+        results[name]["total_ms"] = round(results[name]["startup_ms"] + results[name]["first_call_ms"], 1)
+    return results
+
+
+def importtime_report(module="function_app", top=15, preload=False):
+    """Summarize ``python -X importtime`` output by top-level package (self time, ms)."""
+    env = dict(os.environ, **PROBE_ENV, PRELOAD_SOURCES="true" if preload else "false")
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, env=env,
+                               capture_output=True, text=True, check=True)
+    packages = {}
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "total_ms": round(sum(packages.values()) / 1000, 1),
+        "packages": [{"package": package, "self_ms": round(us / 1000, 1)} for package, us in ranked[:top]],
+    }
+
+
+def check_budget(results, budget):
+    """Return a list of triggers over their total cold-start budget."""
+    failures = []
+    for name, result in results.items():
+        limit = budget.get("triggers_ms", {}).get(name, budget.get("default_trigger_ms"))
+        if limit is not None and result["total_ms"] > limit:
+            failures.append(f"{name}: {result['total_ms']} ms > budget {limit} ms")
+    startup = max(result["startup_ms"] for result in results.values())
+    if budget.get("startup_ms") is not None and startup > budget["startup_ms"]:
+        failures.append(f"function_app startup: {startup} ms > budget {budget['startup_ms']} ms")
+    return failures
+
+
+# Usage: python -m benchmarks.cold_start [--runs 5] [--preload] [--importtime] [--json out.json] [--check]
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start and import-time profile of the function app")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per trigger")
+    parser.add_argument("--preload", action="store_true", help="measure with PRELOAD_SOURCES=true (eager imports)")
+    parser.add_argument("--importtime", action="store_true", help="also print the -X importtime package summary")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--check", action="store_true", help=f"exit non-zero when over {BUDGET_FILE.name}")
+    args = parser.parse_args()
+
+    results = measure(args.runs, preload=args.preload)
+    print(f"{'trigger':<32} {'startup ms':>11} {'first call ms':>14} {'total ms':>9}")
+    for name, result in results.items():
+        print(f"{name:<32} {result['startup_ms']:>11.1f} {result['first_call_ms']:>14.1f} {result['total_ms']:>9.1f}")
+
+    output = {"preload": args.preload, "triggers": results}
+    if args.importtime:
+        output["importtime"] = importtime_report(preload=args.preload)
+        print(f"\nimport function_app: {output['importtime']['total_ms']} ms of module execution")
+        for entry in output["importtime"]["packages"]:
+            print(f"  {entry['package']:<30} {entry['self_ms']:>8.1f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(output, f, indent=2)
+
+    if args.check:
+        with open(BUDGET_FILE) as f:
+            failures = check_budget(results, json.load(f))
+        for failure in failures:
+            print(f"OVER BUDGET: {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
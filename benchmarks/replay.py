@@ -0,0 +1,258 @@
+import copy
+import json
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone, timedelta
+from email.utils import format_datetime
+from pathlib import Path
+from unittest import mock
+from src.utils import instrumentation
+from src.utils.youtube_quota import youtube_quota
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_fixture(name):
+    path = FIXTURES / name
+    return json.loads(path.read_text()) if path.suffix == ".json" else path.read_text()
+
+
+def _iso(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class ReplayRequest:
+    """Stands in for googleapiclient's HttpRequest."""
+
+    def __init__(self, response, method_id):
+        self.response = response
+        self.methodId = method_id
+
+    def execute(self, *args, **kwargs):
+        youtube_quota.check(self.methodId)
+        instrumentation.increment("http_calls")
+        instrumentation.increment("youtube_calls")
+        youtube_quota.charge(self.methodId)
+        return copy.deepcopy(self.response)
+
+
+class _Resource:
+    def __init__(self, handler):
+        self.list = handler
+
+
+class ReplayYouTube:
+    """YouTube Data API service replaying recorded responses.
+
+    Every playlist contains ``items_per_source`` videos published ``spacing``
+    apart, newest first, built from the recorded playlist item.
+    """
+
+    def __init__(self, items_per_source=100, spacing=timedelta(minutes=15)):
+        self.items_per_source = items_per_source
+        self.spacing = spacing
+        self.now = datetime.now(timezone.utc)
+        self.item_template = load_fixture("youtube_playlist_item.json")
+
+    def channels(self):
+        def handler(id, **kwargs):
+            response = load_fixture("youtube_channels.json")
+            response["items"][0]["id"] = id
+            response["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"] = f"UU{id}"
+            return ReplayRequest(response, "youtube.channels.list")
+        return _Resource(handler)
+
+    def playlists(self):
+        def handler(id, **kwargs):
+            response = load_fixture("youtube_playlists.json")
+            response["items"][0]["id"] = id
+            return ReplayRequest(response, "youtube.playlists.list")
+        return _Resource(handler)
+
+    def playlistItems(self):
+        def handler(playlistId, maxResults=50, pageToken=None, **kwargs):
+            start = int(pageToken or 0)
+            end = min(start + maxResults, self.items_per_source)
+            items = []
+            for position in range(start, end):
+                item = copy.deepcopy(self.item_template)
+                snippet = item["snippet"]
+                snippet["title"] = f"Example Movie {position} Official Trailer"
+                snippet["position"] = position
+                snippet["publishedAt"] = _iso(self.now - self.spacing * (position + 1))
+                snippet["resourceId"]["videoId"] = f"{playlistId}-{position}"
+                items.append(item)
+            response = {"kind": "youtube#playlistItemListResponse", "items": items}
+            if end < self.items_per_source:
+                response["nextPageToken"] = str(end)
+            return ReplayRequest(response, "youtube.playlistItems.list")
+        return _Resource(handler)
+
+    def videos(self):
+        def handler(id, **kwargs):
+            items = []
+            for video_id in id.split(","):
+                # Every tenth video is a Short
+                short = video_id.endswith("9")
+                items.append({"kind": "youtube#video", "id": video_id,
+                              "contentDetails": {"duration": "PT45S" if short else "PT2M30S"},
+                              "statistics": {"viewCount": "1024"}})
+            return ReplayRequest({"kind": "youtube#videoListResponse", "items": items}, "youtube.videos.list")
+        return _Resource(handler)
+
+
+class ReplayResponse:
+    """Minimal requests.Response replacement."""
+
+    def __init__(self, status_code=200, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.text = content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} error", response=self)
+
+
+def synthetic_rss(item_count, now=None):
+    """An RSS document with ``item_count`` items built from the recorded item."""
+    now = now or datetime.now(timezone.utc)
+    template = load_fixture("rss_item.xml")
+    items = "".join(template.format(n=n, date=format_datetime(now - timedelta(minutes=n)))
+                    for n in range(item_count))
+    return ('<?xml version="1.0" encoding="utf-8"?>'
+            '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel>'
+            '<title>Synthetic feed</title><link>https://news.example.edu</link>'
+            f'<description>Benchmark feed</description>{items}</channel></rss>').encode()
+
+
+class ReplayHttp:
+    """Routes HTTP GETs to recorded weather responses or synthetic RSS feeds."""
+
+    def __init__(self, feed_items=100, forecast_slots=40):
+        self.feed_body = synthetic_rss(feed_items)
+        self.forecast_slots = forecast_slots
+
+    def _forecast(self):
+        slot = load_fixture("weather_forecast_slot.json")
+        start = int(time.time()) // 10800 * 10800
+        slots = []
+        for i in range(self.forecast_slots):
+            entry = copy.deepcopy(slot)
+            entry["dt"] = start + i * 10800
+            entry["main"]["temp_max"] += i % 8
+            entry["main"]["temp_min"] -= i % 5
+            slots.append(entry)
+        return {"cod": "200", "cnt": len(slots), "list": slots,
+                "city": {"name": "Dublin", "timezone": -14400, "coord": {"lat": 40.1157, "lon": -83.1327}}}
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        if "openweathermap.org" in url and "/forecast" in url:
+            return ReplayResponse(200, json.dumps(self._forecast()).encode(), {"Content-Type": "application/json"})
+        if "openweathermap.org" in url:
+            current = load_fixture("weather_current.json")
+            current["dt"] = int(time.time())
+            return ReplayResponse(200, json.dumps(current).encode(), {"Content-Type": "application/json"})
+        return ReplayResponse(200, self.feed_body, {"Content-Type": "application/rss+xml; charset=utf-8"})
+
+    def request(self, method, url, **kwargs):
+        return self.get(url, **kwargs)
+
+
+class _ReplaySubreddit:
+    def __init__(self, name, template):
+        self.name = name
+        self.template = template
+
+    def hot(self, limit=5):
+        # One listing request per 100 posts, as counted by the live requestor
+        instrumentation.increment("http_calls", max(1, -(-limit // 100)))
+        for i in range(limit):
+            data = dict(self.template, id=f"{self.name}{i}", score=self.template["score"] + i)
+            data["permalink"] = f"/r/{self.name}/comments/{data['id']}/post_{i}/"
+            data["url"] = f"https://www.reddit.com{data['permalink']}"
+            data["title"] = f"{self.template['title']} ({i})"
+            yield _ReplayPost(data, self.name)
+
+
+class _ReplayPost:
+    def __init__(self, data, subreddit):
+        self.__dict__.update(data)
+        self.subreddit = type("Subreddit", (), {"display_name": subreddit})()
+
+
+class ReplayReddit:
+    """praw.Reddit replacement serving the recorded post."""
+
+    def __init__(self, *args, **kwargs):
+        self.template = load_fixture("reddit_post.json")
+
+    def subreddit(self, name):
+        return _ReplaySubreddit(name, self.template)
+
+
+class CountingCollection:
+    """Wraps a collection and counts every call that would be a server round trip."""
+
+    ROUND_TRIP_METHODS = {
+        "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+        "delete_one", "delete_many", "bulk_write", "count_documents", "aggregate",
+        "create_index", "index_information", "distinct", "find_one_and_update",
+    }
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name == "find":
+            def find(*args, **kwargs):
+                instrumentation.increment("db_round_trips")
+                return attribute(*args, **kwargs)
+            return find
+        if name in self.ROUND_TRIP_METHODS:
+            def call(*args, **kwargs):
+                instrumentation.increment("db_round_trips")
+                with instrumentation.stage(f"db.{name}"):
+                    return attribute(*args, **kwargs)
+            return call
+        return attribute
+
+
+class CountingDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getitem__(self, name):
+        return CountingCollection(self._database[name])
+
+    def __getattr__(self, name):
+        return getattr(self._database, name)
+
+
+class CountingClient:
+    """mongomock client whose collections count round trips like the live CommandListener."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getitem__(self, name):
+        return CountingDatabase(self._client[name])
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def install_replays(youtube, http, reddit_class=ReplayReddit):
+    """Patch every outbound API client with the replay doubles; returns an ExitStack."""
+    stack = ExitStack()
+    for target in ("src.movies.trailers.get_youtube_client", "src.music.music_videos.get_youtube_client"):
+        stack.enter_context(mock.patch(target, lambda: youtube))
+    stack.enter_context(mock.patch("src.utils.http_client.get_session", lambda: http))
+    stack.enter_context(mock.patch("praw.Reddit", reddit_class))
+    return stack
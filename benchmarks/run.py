@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import subprocess
+
+# Keep benchmark data away from real containers before any src module reads the env
+os.environ.setdefault("COSMOS_DB_CONTAINER_NAME", "benchmark_items")
+os.environ.setdefault("COSMOS_DB_STATE_CONTAINER_NAME", "benchmark_state")
+
+from src.utils import db_connection, instrumentation
+from src.utils.metadata_cache import youtube_metadata
+from benchmarks.replay import ReplayYouTube, ReplayHttp, CountingClient, install_replays
+
+SEED_TYPES = ("news", "trailer", "music", "reddit")
+
+# mongomock has no real indexes, so every upsert scans the collection; keep its
+# default scenarios small enough to finish and run the 10k ones against mongod
+DEFAULTS = {
+    "mongod": {"sizes": "0,1000,10000", "feed_items": 10000},
+    "mongomock": {"sizes": "0,250,1000", "feed_items": 500},
+}
+
+
+def fetchers(feed_urls):
+    # Imported lazily so the replay patches are in place first
+    from src.news.news import fetch_and_store_news
+    from src.music.pitchfork import fetch_and_store_feeds
+    from src.movies.trailers import fetch_and_store_trailers
+    from src.music.music_videos import fetch_and_store_music_videos
+    from src.weather.weather import fetch_and_store_weather_data
+    from src.reddit.reddit_posts import fetch_and_store_reddit_posts, fetch_and_store_subreddits
+    from src.ingest import run_ingest
+    from src.utils.constants import LAT, LON
+    return {
+        "news": lambda: fetch_and_store_news(feed_urls),
+        "pitchfork": lambda: fetch_and_store_feeds(feed_urls),
+        "trailers": fetch_and_store_trailers,
+        "music": fetch_and_store_music_videos,
+        "weather": lambda: fetch_and_store_weather_data(LAT, LON),
+        "reddit": lambda: fetch_and_store_reddit_posts("azure", post_limit=100),
+        "subreddits": lambda: fetch_and_store_subreddits(post_limit=25),
+        # The coordinated 3 a.m. run, unpaced so it measures the same work as news + trailers + music
+        "ingest": lambda: run_ingest(units_per_second=0),
+    }
+
+
+def connect(mongo_uri):
+    if mongo_uri:
+        from pymongo import MongoClient
+        db_connection.database_name = "benchmark"
+        db_connection.set_client(MongoClient(mongo_uri, event_listeners=[db_connection.command_metrics]))
+        return "mongod"
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit("mongomock is not installed: pip install -r benchmarks/requirements.txt, or pass --mongo-uri")
+    db_connection.set_client(CountingClient(mongomock.MongoClient()))
+    return "mongomock"
+
+
+def seed(size):
+    """Fill the content container with ``size`` pre-existing documents."""
+    collection = db_connection.get_content_collection()
+    collection.delete_many({})
+    batch = []
+    for i in range(size):
+        batch.append({
+            "type": SEED_TYPES[i % len(SEED_TYPES)],
+            "url": f"https://seed.example.com/{i}",
+            "title": f"Seed document {i}",
+            "date": "2024-01-01",
+            "insertDate": "2024-01-01",
+            "description": "x" * 200,
+            "benchmark_seed": True,
+        })
+        if len(batch) == 1000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def reset_run_state():
+    """Undo the previous iteration so every run does the same amount of work."""
+    db_connection.get_content_collection().delete_many({"benchmark_seed": {"$ne": True}})
+    db_connection.get_collection(os.environ["COSMOS_DB_STATE_CONTAINER_NAME"]).delete_many({})
+    youtube_metadata._values = None
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run_scenario(name, fetch, size, iterations):
+    durations, counters = [], []
+    for _ in range(iterations):
+        reset_run_state()
+        with instrumentation.collect(name) as run:
+            start = time.perf_counter()
+            fetch()
+            durations.append(time.perf_counter() - start)
+        counters.append(run.counters)
+    items = counters[-1].get("items_processed", 0)
+    p50 = percentile(durations, 0.5)
+    return {
+        "fetcher": name,
+        "collection_size": size,
+        "iterations": iterations,
+        "p50_ms": round(1000 * p50, 2),
+        "p95_ms": round(1000 * percentile(durations, 0.95), 2),
+        "max_ms": round(1000 * max(durations), 2),
+        "items": items,
+        "items_per_s": round(items / p50, 1) if p50 else 0.0,
+        "db_round_trips": counters[-1].get("db_round_trips", 0),
+        "http_calls": counters[-1].get("http_calls", 0),
+    }
+
+
+def print_table(results, baseline=None):
+    previous = {(r["fetcher"], r["collection_size"]): r for r in (baseline or {}).get("results", [])}
+    header = f"{'fetcher':<10} {'docs':>7} {'p50 ms':>9} {'p95 ms':>9} {'items':>6} {'items/s':>9} {'db ops':>7} {'http':>5}"
+    print(header + ("  vs baseline" if previous else ""))
+    for r in results:
+        line = (f"{r['fetcher']:<10} {r['collection_size']:>7} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                f"{r['items']:>6} {r['items_per_s']:>9.1f} {r['db_round_trips']:>7} {r['http_calls']:>5}")
+        old = previous.get((r["fetcher"], r["collection_size"]))
+        if old and old["p50_ms"]:
+            change = 100 * (r["p50_ms"] - old["p50_ms"]) / old["p50_ms"]
+            line += f"  p50 {change:+.1f}%, db ops {r['db_round_trips'] - old['db_round_trips']:+d}"
+        print(line)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except Exception:
+        return None
+
+
+# Usage: python -m benchmarks.run [--mongo-uri mongodb://localhost:27017] [--sizes 0,1000,10000]
+#                                 [--only news,trailers] [--json out.json] [--compare base.json]
+def main():
+    parser = argparse.ArgumentParser(description="Offline fetcher benchmarks against replayed API responses")
+    parser.add_argument("--sizes", help="comma-separated pre-existing collection sizes")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--feed-items", type=int, help="items in each synthetic RSS feed")
+    parser.add_argument("--feeds", type=int, default=2, help="number of synthetic feeds per RSS fetcher")
+    parser.add_argument("--videos", type=int, default=100, help="videos per YouTube channel/playlist")
+    parser.add_argument("--only", help="comma-separated fetcher names to run")
+    parser.add_argument("--mongo-uri", help="benchmark against a local mongod instead of mongomock")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="results file from another commit to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+    backend = connect(args.mongo_uri)
+    sizes = args.sizes or DEFAULTS[backend]["sizes"]
+    feed_items = args.feed_items or DEFAULTS[backend]["feed_items"]
+    feed_urls = [f"https://feeds.example.com/{i}.xml" for i in range(args.feeds)]
+    youtube = ReplayYouTube(items_per_source=args.videos)
+    http = ReplayHttp(feed_items=feed_items)
+
+    results = []
+    with install_replays(youtube, http):
+        scenarios = fetchers(feed_urls)
+        selected = args.only.split(",") if args.only else list(scenarios)
+        for size in (int(s) for s in sizes.split(",")):
+            seed(size)
+            for name in selected:
+                results.append(run_scenario(name, scenarios[name], size, args.iterations))
+                print(f"  {name} @ {size} docs done", file=sys.stderr)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print(f"backend: {backend}, revision: {git_revision()}")
+    print_table(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"revision": git_revision(), "backend": backend, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,116 @@
 # function_app.py
 import azure.functions as func
+import os
+import json
 import logging
-from src.news.news import fetch_and_store_news
-from src.weather.weather import fetch_and_store_weather_data
-from src.movies.trailers import fetch_and_store_trailers
-from src.music.music_videos import fetch_and_store_music_videos
-from src.utils.constants import  LAT, LON
+from src.utils.instrumentation import instrumented
+from src.utils.response_cache import dashboard_cache
+
+# Source modules (and with them pymongo, feedparser, googleapiclient, praw) are
+# imported inside each trigger, so a cold worker only loads what the invoked
+# trigger needs. PRELOAD_SOURCES=true imports everything at startup instead.
+if os.getenv("PRELOAD_SOURCES", "false").lower() == "true":
+    import src.ingest, src.news.news, src.weather.weather, src.movies.trailers, src.music.music_videos  # noqa: F401
+    import src.reddit.reddit_posts, src.utils.retention, src.api.dashboard, src.api.snapshot  # noqa: F401
 
 
 # Create a FunctionApp instance
 app = func.FunctionApp()
 
 
-# 1. News Trigger - Every morning at 5 a.m. EST :0 0 5 * * * 
-@app.function_name(name="InsertNewsTimerTrigger")
-@app.timer_trigger(schedule="0 0 3 * * *", arg_name="newsTimer", run_on_startup=False, use_monitor=False) 
-def NewsTrigger(newsTimer: func.TimerRequest) -> None:
-    if newsTimer.past_due:
+# 1. Ingest Trigger - Every morning at 3 a.m., news, trailers and music videos in one coordinated run
+@app.function_name(name="InsertContentTimerTrigger")
+@app.timer_trigger(schedule="0 0 3 * * *", arg_name="ingestTimer", run_on_startup=False, use_monitor=False)
+@instrumented("InsertContentTimerTrigger")
+def IngestTrigger(ingestTimer: func.TimerRequest) -> None:
+    if ingestTimer.past_due:
         logging.info('The timer is past due!')
-    fetch_and_store_news()
-    
+    from src.ingest import run_ingest
+    run_ingest()
+
 
 # 2. Weather Trigger - every day at 1 a.m. EST  
 @app.function_name(name="InsertWeatherTimerTrigger")
 @app.timer_trigger(schedule="0 0 6 * * *", arg_name="weatherTimer", run_on_startup=False, use_monitor=False) 
+@instrumented("InsertWeatherTimerTrigger")
 def WeatherTrigger(weatherTimer: func.TimerRequest) -> None:
     if weatherTimer.past_due:
         logging.info('The timer is past due!')
-    fetch_and_store_weather_data(LAT,LON)
-    
-
-# 3. Movie Trailer Trigger - Everyday at 5 a.m.
-@app.function_name(name="InsertTrailersTimerTrigger")
-@app.timer_trigger(schedule="0 0 3 * * *", arg_name="trailersTimer", run_on_startup=False, use_monitor=False)
-def TrailerTrigger(trailersTimer: func.TimerRequest) -> None:
-    if trailersTimer.past_due:
+    from src.weather.weather import fetch_and_store_weather_data
+    fetch_and_store_weather_data()
+
+
+# 3. Reddit Trigger - Everyday at 4 a.m., hot posts of every subreddit in SUBREDDIT_LIST
+@app.function_name(name="InsertRedditTimerTrigger")
+@app.timer_trigger(schedule="0 0 4 * * *", arg_name="redditTimer", run_on_startup=False, use_monitor=False)
+@instrumented("InsertRedditTimerTrigger")
+def RedditTrigger(redditTimer: func.TimerRequest) -> None:
+    if redditTimer.past_due:
         logging.info('The timer is past due!')
-    fetch_and_store_trailers()  
-    
-     
-
-# 4. Music Videos Trigger - Everyday at 5 a.m. EST
-@app.function_name(name="InsertMusicVideosTimerTrigger")
-@app.timer_trigger(schedule="0 0 3 * * *", arg_name="musicVideosTimer", run_on_startup=False, use_monitor=False)
-def MusicVideosTrigger(musicVideosTimer: func.TimerRequest) -> None:
-    if musicVideosTimer.past_due:
+    from src.reddit.reddit_posts import fetch_and_store_subreddits
+    fetch_and_store_subreddits()
+
+
+# 4. Retention Trigger - Everyday at 2 a.m., strips heavy text from old items and expires the oldest
+@app.function_name(name="CompactContentTimerTrigger")
+@app.timer_trigger(schedule="0 0 2 * * *", arg_name="retentionTimer", run_on_startup=False, use_monitor=False)
+@instrumented("CompactContentTimerTrigger")
+def RetentionTrigger(retentionTimer: func.TimerRequest) -> None:
+    if retentionTimer.past_due:
         logging.info('The timer is past due!')
-    fetch_and_store_music_videos()
-    
+    from src.utils.retention import apply_retention
+    apply_retention(dry_run=os.getenv("RETENTION_DRY_RUN", "false").lower() == "true")
+
+
+# 5. Health probe - database reachability, latency and connection pool metrics
+@app.function_name(name="HealthCheck")
+@app.route(route="health", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+def HealthCheck(req: func.HttpRequest) -> func.HttpResponse:
+    from src.utils.db_connection import ping
+    result = ping()
+    return func.HttpResponse(json.dumps(result), status_code=200 if result["ok"] else 503,
+                             mimetype="application/json")
+
+
+
+# 6. Dashboard read API - paginated, projected views per item type, e.g.
+#    GET /api/items/news?date=today&page_size=20&fields=title,url
+#    and the next page with &cursor=<next_cursor of the previous page>
+@app.function_name(name="DashboardItems")
+@app.route(route="items/{item_type}", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+def DashboardItems(req: func.HttpRequest) -> func.HttpResponse:
+    from src.api.dashboard import QueryError, get_items_response, etag_matches
+    try:
+        body, etag = get_items_response(req.route_params.get("item_type"), req.params)
+    except QueryError as e:
+        return func.HttpResponse(json.dumps({"error": str(e)}), status_code=e.status, mimetype="application/json")
+    except Exception as e:
+        logging.error(f"Dashboard query failed: {e}")
+        return func.HttpResponse(json.dumps({"error": "query failed"}), status_code=500, mimetype="application/json")
+
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={int(dashboard_cache.ttl_seconds)}"}
+    if etag_matches(req.headers.get("If-None-Match"), etag):
+        return func.HttpResponse(status_code=304, headers=headers)
+    return func.HttpResponse(body, status_code=200, headers=headers, mimetype="application/json")
+
+
+
+# 7. Dashboard snapshot - the day's top items of every type in one point read
+#    GET /api/snapshot?date=today
+@app.function_name(name="DashboardSnapshot")
+@app.route(route="snapshot", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+def DashboardSnapshot(req: func.HttpRequest) -> func.HttpResponse:
+    from src.api.dashboard import QueryError, etag_matches
+    from src.api.snapshot import get_snapshot_response
+    try:
+        body, etag = get_snapshot_response(req.params)
+    except QueryError as e:
+        return func.HttpResponse(json.dumps({"error": str(e)}), status_code=e.status, mimetype="application/json")
+    except Exception as e:
+        logging.error(f"Dashboard snapshot read failed: {e}")
+        return func.HttpResponse(json.dumps({"error": "query failed"}), status_code=500, mimetype="application/json")
+
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={int(dashboard_cache.ttl_seconds)}"}
+    if etag_matches(req.headers.get("If-None-Match"), etag):
+        return func.HttpResponse(status_code=304, headers=headers)
+    return func.HttpResponse(body, status_code=200, headers=headers, mimetype="application/json")
@@ -0,0 +1,185 @@
+import os
+import json
+import base64
+import hashlib
+from datetime import datetime
+from bson import json_util
+from src.utils.db_connection import get_content_collection, run_with_retry
+from src.utils.response_cache import dashboard_cache
+from src.utils.constants import API_DEFAULT_PAGE_SIZE, API_MAX_PAGE_SIZE
+
+# Fields each view returns by default, the extra fields a client may ask for with
+# ?fields=, and the date the view filters and sorts on
+VIEWS = {
+    "news": {
+        "fields": ["title", "url", "body", "description", "category", "thumbnail", "date", "insertDate"],
+        "optional": [],
+        "date_field": "insertDate",
+        "sort": -1,
+    },
+    "trailer": {
+        "fields": ["title", "url", "thumbnail", "description", "date", "published_at", "insertDate"],
+        "optional": [],
+        "date_field": "insertDate",
+        "sort": -1,
+    },
+    "music": {
+        "fields": ["title", "url", "thumbnail", "description", "date", "published_at", "insertDate"],
+        "optional": [],
+        "date_field": "insertDate",
+        "sort": -1,
+    },
+    "reddit": {
+        "fields": ["title", "url", "permalink", "score", "subreddit", "author", "image_url", "date", "insertDate"],
+        # Self posts can be long, so their text is only sent when asked for
+        "optional": ["selftext", "score_history"],
+        "date_field": "insertDate",
+        "sort": -1,
+    },
+    "weather": {
+        "fields": ["date", "status", "high_temp", "low_temp", "lat", "lon"],
+        "optional": [],
+        "date_field": "date",
+        "sort": 1,
+    },
+}
+
+
+class QueryError(ValueError):
+    """A request the API rejects; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_date(value, name):
+    if value == "today":
+        return datetime.today().strftime('%Y-%m-%d')
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise QueryError(f"{name} must be 'today' or YYYY-MM-DD")
+
+
+def _parse_int(value, name, default, minimum, maximum):
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+    if not minimum <= number <= maximum:
+        raise QueryError(f"{name} must be between {minimum} and {maximum}")
+    return number
+
+
+def encode_cursor(document, date_field):
+    """Opaque cursor pointing just past ``document`` in (date_field, _id) order."""
+    text = json_util.dumps([document.get(date_field), document["_id"]])
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(value):
+    try:
+        date_value, document_id = json_util.loads(base64.urlsafe_b64decode(value.encode("ascii")))
+    except Exception:
+        raise QueryError("cursor is not valid")
+    return date_value, document_id
+
+
+def parse_query(item_type, params):
+    """Validate query string parameters into a normalized, hashable query."""
+    view = VIEWS.get(item_type)
+    if view is None:
+        raise QueryError(f"Unknown item type '{item_type}'", status=404)
+    max_page_size = int(os.getenv("API_MAX_PAGE_SIZE", API_MAX_PAGE_SIZE))
+    fields = tuple(view["fields"])
+    if params.get("fields"):
+        requested = [field.strip() for field in params["fields"].split(",") if field.strip()]
+        unknown = sorted(set(requested) - set(view["fields"]) - set(view["optional"]))
+        if unknown:
+            raise QueryError(f"Unknown fields for {item_type}: {', '.join(unknown)}")
+        fields = tuple(requested)
+    return {
+        "date": parse_date(params["date"], "date") if params.get("date") else None,
+        "since": parse_date(params["since"], "since") if params.get("since") else None,
+        "cursor": params.get("cursor") or None,
+        "page_size": _parse_int(params.get("page_size"), "page_size",
+                                int(os.getenv("API_DEFAULT_PAGE_SIZE", API_DEFAULT_PAGE_SIZE)), 1, max_page_size),
+        "fields": fields,
+    }
+
+
+def fetch_page(item_type, query, collection=None):
+    """Read one page of a view. Fetches one extra document to tell whether more pages follow.
+
+    Pages are keyset-paginated on (date field, _id): the ``next_cursor`` of a
+    page encodes its last document, and the next page starts right after it
+    with an index range instead of skipping over every earlier page.
+    """
+    view = VIEWS[item_type]
+    date_field = view["date_field"]
+    filter = {"type": item_type}
+    if query["date"]:
+        filter[date_field] = query["date"]
+    elif query["since"]:
+        filter[date_field] = {"$gte": query["since"]}
+    if query["cursor"]:
+        date_value, document_id = decode_cursor(query["cursor"])
+        after = "$lt" if view["sort"] < 0 else "$gt"
+        filter = {"$and": [filter, {"$or": [{date_field: {after: date_value}},
+                                            {date_field: date_value, "_id": {after: document_id}}]}]}
+    projection = {field: 1 for field in query["fields"]}
+    # The cursor fields are always read, and dropped again unless they were asked for
+    projection[date_field] = 1
+    collection = collection or get_content_collection()
+
+    def read():
+        cursor = (collection.find(filter, projection)
+                  .sort([(date_field, view["sort"]), ("_id", view["sort"])])
+                  .limit(query["page_size"] + 1))
+        return list(cursor)
+
+    documents = run_with_retry(read)
+    has_more = len(documents) > query["page_size"]
+    documents = documents[:query["page_size"]]
+    next_cursor = encode_cursor(documents[-1], date_field) if has_more else None
+    hidden = {"_id"} | ({date_field} - set(query["fields"]))
+    return {
+        "type": item_type,
+        "page_size": query["page_size"],
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "items": [{k: v for k, v in document.items() if k not in hidden} for document in documents],
+    }
+
+
+def body_etag(body):
+    return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def get_items_response(item_type, params):
+    """Return ``(body, etag)`` for a view, from the response cache when possible.
+
+    The ETag is a hash of the body, so it stays valid across workers and cache
+    expiry as long as the underlying data has not changed.
+    """
+    query = parse_query(item_type, params)
+    key = (item_type, query["date"], query["since"], query["cursor"], query["page_size"], query["fields"])
+    cached = dashboard_cache.get(key)
+    if cached is not None:
+        return cached
+    body = json.dumps(fetch_page(item_type, query), default=str)
+    etag = body_etag(body)
+    dashboard_cache.put(key, (body, etag))
+    return body, etag
+
+
+def etag_matches(if_none_match, etag):
+    """True when an If-None-Match header covers ``etag``."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison: W/"x" matches "x"
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import logging
+from datetime import datetime, timezone
+from src.api.dashboard import QueryError, body_etag, parse_date
+from src.utils.db_connection import get_content_collection, run_with_retry
+from src.utils.state_store import get_state_collection
+from src.utils.response_cache import dashboard_cache
+from src.utils.constants import SNAPSHOT_TOP_N
+
+SNAPSHOT_NAMESPACE = "snapshot"
+
+# How each snapshot section picks its top items as of the snapshot day, and the
+# few fields a snapshot card shows; the full views stay behind /api/items.
+# Every multi-field sort needs its compound index in src.utils.schema on Cosmos DB.
+SECTIONS = {
+    "news": {"filter": lambda day: {"insertDate": {"$lte": day}}, "sort": [("insertDate", -1), ("_id", -1)],
+             "fields": ["title", "url", "thumbnail", "date"]},
+    "trailer": {"filter": lambda day: {"insertDate": {"$lte": day}}, "sort": [("insertDate", -1), ("_id", -1)],
+                "fields": ["title", "url", "thumbnail", "date"]},
+    "music": {"filter": lambda day: {"insertDate": {"$lte": day}}, "sort": [("insertDate", -1), ("_id", -1)],
+              "fields": ["title", "url", "thumbnail", "date"]},
+    "reddit": {"filter": lambda day: {"insertDate": {"$lte": day}}, "sort": [("insertDate", -1), ("score", -1)],
+               "fields": ["title", "url", "permalink", "score", "subreddit", "date"]},
+    "weather": {"filter": lambda day: {"date": {"$gte": day}}, "sort": [("date", 1)],
+                "fields": ["date", "status", "high_temp", "low_temp"]},
+}
+
+
+def snapshot_id(day):
+    # Same layout as StateStore documents, so snapshots live beside the other bookkeeping
+    return f"{SNAPSHOT_NAMESPACE}:{day}"
+
+
+def build_section(item_type, day, limit=None, collection=None):
+    """Query the top items of one type with only the fields its snapshot card shows."""
+    section = SECTIONS[item_type]
+    limit = limit or int(os.getenv("SNAPSHOT_TOP_N", SNAPSHOT_TOP_N))
+    collection = collection or get_content_collection()
+    projection = {field: 1 for field in section["fields"]}
+    projection["_id"] = 0
+    filter = dict(section["filter"](day), type=item_type)
+    items = run_with_retry(lambda: list(collection.find(filter, projection).sort(section["sort"]).limit(limit)))
+    return {"items": items, "updated_at": datetime.now(timezone.utc).isoformat()}
+
+
+def refresh_snapshot(item_types=None, day=None):
+    """Rebuild the given sections (default: all) of a day's snapshot in place.
+
+    Only the listed sections are queried and ``$set``, so a single source
+    re-running costs one query and one write.
+    """
+    day = day or datetime.today().strftime('%Y-%m-%d')
+    item_types = [t for t in (item_types or SECTIONS) if t in SECTIONS]
+    if not item_types:
+        return None
+    update = {f"sections.{item_type}": build_section(item_type, day) for item_type in item_types}
+    update.update({"namespace": SNAPSHOT_NAMESPACE, "key": day, "date": day})
+    state = get_state_collection()
+    run_with_retry(lambda: state.update_one({"_id": snapshot_id(day)}, {"$set": update}, upsert=True))
+    dashboard_cache.invalidate(SNAPSHOT_NAMESPACE)
+    logging.info(f"Refreshed dashboard snapshot {day}: {', '.join(item_types)}")
+    return update
+
+
+def get_snapshot(day=None):
+    """Point read of a day's snapshot, or None when it has not been built."""
+    day = day or datetime.today().strftime('%Y-%m-%d')
+    state = get_state_collection()
+    document = run_with_retry(lambda: state.find_one({"_id": snapshot_id(day)}))
+    if document is None:
+        return None
+    return {"date": day, "sections": document.get("sections", {})}
+
+
+def get_snapshot_response(params):
+    """Return ``(body, etag)`` for a day's snapshot, from the response cache when possible."""
+    day = parse_date(params["date"], "date") if params.get("date") else datetime.today().strftime('%Y-%m-%d')
+    key = (SNAPSHOT_NAMESPACE, day)
+    cached = dashboard_cache.get(key)
+    if cached is not None:
+        return cached
+    snapshot = get_snapshot(day)
+    if snapshot is None:
+        raise QueryError(f"No snapshot for {day}", status=404)
+    body = json.dumps(snapshot, default=str)
+    response = (body, body_etag(body))
+    dashboard_cache.put(key, response)
+    return response
+
+
+# Usage: python -m src.api.snapshot [YYYY-MM-DD]   (rebuilds every section)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    target_day = sys.argv[1] if len(sys.argv) > 1 else None
+    refresh_snapshot(day=target_day)
+    print(json.dumps(get_snapshot(target_day), indent=2, default=str))
@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import time
+import logging
+from src.pipeline import run_pipeline
+from src.utils import instrumentation
+from src.utils.bulk_ingest import WriteBudget
+from src.utils.concurrency import iter_completed
+from src.utils.constants import (INGEST_SOURCES, INGEST_MAX_PARALLEL_SOURCES, INGEST_RU_PER_SECOND,
+                                 INGEST_RU_PER_WRITE)
+
+
+# Source modules are imported when their source is built, so a run only loads what it ingests
+def _news_source():
+    from src.utils.feed_ingest import FeedSource
+    from src.news.news import normalize_entry
+    from src.utils.constants import NEWS_URLS
+    return FeedSource(NEWS_URLS, normalize_entry, name="news")
+
+
+def _pitchfork_source():
+    from src.utils.feed_ingest import FeedSource
+    from src.music.pitchfork import normalize_entry
+    from src.utils.constants import PF_RSS_URLS
+    return FeedSource(PF_RSS_URLS, normalize_entry, name="pitchfork")
+
+
+def _trailers_source():
+    from src.utils.youtube_source import YouTubeSource
+    from src.movies.trailers import fetch_channel_videos
+    from src.utils.constants import TRAILER_CHANNEL_IDS
+    return YouTubeSource(TRAILER_CHANNEL_IDS, fetch_channel_videos, "trailer", "channel")
+
+
+def _music_source():
+    from src.utils.youtube_source import YouTubeSource
+    from src.music.music_videos import fetch_playlist_videos
+    from src.utils.constants import MUSIC_VIDEOS_CHANNEL_IDS
+    return YouTubeSource(MUSIC_VIDEOS_CHANNEL_IDS, fetch_playlist_videos, "music", "playlist")
+
+
+SOURCE_BUILDERS = {
+    "news": _news_source,
+    "pitchfork": _pitchfork_source,
+    "trailers": _trailers_source,
+    "music": _music_source,
+}
+
+
+def configured_sources():
+    """Source names from INGEST_SOURCES (comma-separated), in run order."""
+    value = os.getenv("INGEST_SOURCES")
+    if not value:
+        return list(INGEST_SOURCES)
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def run_ingest(names=None, max_parallel=None, units_per_second=None):
+    """Run several sources as one coordinated ingest and return a per-run summary.
+
+    At most ``max_parallel`` sources run at a time, started in the configured
+    order, and every bulk write goes through one shared WriteBudget so the
+    sources take turns on the container instead of competing for its RUs.
+    The dashboard snapshot is refreshed once for all ingested types at the end.
+    A failing source is reported in the summary without stopping the others.
+    """
+    names = list(names or configured_sources())
+    unknown = [name for name in names if name not in SOURCE_BUILDERS]
+    if unknown:
+        raise ValueError(f"Unknown ingest sources {unknown}, expected some of {list(SOURCE_BUILDERS)}")
+    max_parallel = max_parallel or int(os.getenv("INGEST_MAX_PARALLEL_SOURCES", INGEST_MAX_PARALLEL_SOURCES))
+    if units_per_second is None:
+        units_per_second = float(os.getenv("INGEST_RU_PER_SECOND", INGEST_RU_PER_SECOND))
+    budget = WriteBudget(units_per_second, units_per_write=float(os.getenv("INGEST_RU_PER_WRITE", INGEST_RU_PER_WRITE)))
+
+    def ingest(name):
+        source = SOURCE_BUILDERS[name]()
+        stats = run_pipeline(source, budget=budget, materialize=False, replay=False)
+        stats["item_type"] = source.item_type
+        if hasattr(source, "report"):
+            stats["report"] = source.report
+        return stats
+
+    start = time.perf_counter()
+    summary = {"sources": {}, "items": 0, "counts": {}}
+    if os.getenv("WRITE_BUFFER_ENABLED", "true").lower() == "true":
+        # Replayed once here, before the sources start writing, rather than by whichever pipeline starts first
+        from src.utils.write_buffer import write_buffer
+        try:
+            summary["replay"] = write_buffer.replay()
+        except Exception as e:
+            logging.error(f"Failed to replay buffered writes: {e}")
+    for _, name, stats, error, elapsed in iter_completed(ingest, names, max_workers=max_parallel):
+        instrumentation.observe(f"ingest.{name}", elapsed)
+        if error:
+            logging.error(f"Ingest of {name} failed after {elapsed:.1f}s: {error}")
+            summary["sources"][name] = {"status": "failed", "error": str(error), "seconds": round(elapsed, 3)}
+            continue
+        stats["status"] = "succeeded"
+        stats["seconds"] = round(elapsed, 3)
+        summary["sources"][name] = stats
+        summary["items"] += stats["items"]
+        for outcome, count in stats["counts"].items():
+            summary["counts"][outcome] = summary["counts"].get(outcome, 0) + count
+
+    item_types = sorted({stats["item_type"] for stats in summary["sources"].values() if "item_type" in stats})
+    if item_types and os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true":
+        from src.api.snapshot import refresh_snapshot
+        try:
+            refresh_snapshot(item_types)
+        except Exception as e:
+            logging.error(f"Failed to refresh dashboard snapshot for {item_types}: {e}")
+
+    # Keep the summary in source order rather than completion order
+    summary["sources"] = {name: summary["sources"][name] for name in names}
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    summary["write_budget"] = dict(budget.stats, waited_seconds=round(budget.stats["waited_seconds"], 3))
+    logging.info(f"INGEST_SUMMARY {json.dumps(summary, default=str)}")
+    return summary
+
+
+# Usage: python -m src.ingest [news,trailers,music]
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    result = run_ingest(sys.argv[1].split(",") if len(sys.argv) > 1 else None)
+    print(json.dumps(result, indent=2, default=str))
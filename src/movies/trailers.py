@@ -1,47 +1,59 @@
-import os
 import logging
-from datetime import datetime, timezone, timedelta
-from googleapiclient.discovery import build
-from src.utils.db_connection import get_collection
+from src.pipeline import run_pipeline, best_thumbnail
+from src.utils.youtube_client import get_youtube_client, add_video_details
+from src.utils.youtube_quota import QuotaExhausted
+from src.utils.youtube_source import YouTubeSource
+from src.utils.metadata_cache import youtube_metadata
+from src.utils.watermarks import WatermarkStore, parse_published_at, newest_before_pending
 from src.utils.constants import TRAILER_CHANNEL_IDS
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
-# Set up YouTube API client
-API_KEY = os.getenv('YOUTUBE_API_KEY')
 
-
-def fetch_channel_videos(channel_id):
-    """Fetch recent trailer videos directly from a channel's uploads."""
+def fetch_channel_videos(channel_id, watermarks=None):
+    """Fetch trailer videos uploaded to a channel since its last watermark."""
     try:
-        youtube = build('youtube', 'v3', developerKey=API_KEY)
+        youtube = get_youtube_client()
         videos = []
-        today = datetime.now(timezone.utc).date()
-        yesterday = today - timedelta(days=1)  # Look for videos from yesterday too
+        watermarks = watermarks or WatermarkStore()
+        since, last_video_id = watermarks.since(channel_id)
         
-        # First, get the channel's uploads playlist ID
-        channels_response = youtube.channels().list(
-            part="contentDetails,snippet",
-            id=channel_id
-        ).execute()
-
-        if not channels_response.get('items'):
+        # First, get the channel's uploads playlist ID (cached, it practically never changes)
+        def load_channel():
+            channels_response = youtube.channels().list(
+                part="contentDetails,snippet",
+                id=channel_id
+            ).execute()
+            if not channels_response.get('items'):
+                return None
+            channel = channels_response['items'][0]
+            return {
+                "title": channel['snippet']['title'],
+                "uploads_playlist_id": channel['contentDetails']['relatedPlaylists']['uploads'],
+            }
+
+        channel = youtube_metadata.get_or_load(f"channel:{channel_id}", load_channel)
+        if not channel:
             logging.error(f"No channel found for ID: {channel_id}")
             return []
 
         # Get channel title for better logging
-        channel_title = channels_response['items'][0]['snippet']['title']
-        logging.info(f"Processing channel: {channel_title}")
+        channel_title = channel['title']
+        logging.info(f"Processing channel: {channel_title} (videos since {since.isoformat()})")
 
         # Get the uploads playlist ID
-        uploads_playlist_id = channels_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+        uploads_playlist_id = channel['uploads_playlist_id']
 
-        # Request videos from channel's uploads with pagination
-        videos_processed = 0
+        # Request videos from channel's uploads with pagination. Uploads are listed
+        # newest first, so we stop at the first video at or before the watermark;
+        # there is no page cap, a missed run catches up on everything since then
+        # (at most YOUTUBE_MAX_CATCHUP_DAYS, and only as far as the quota allows).
         next_page_token = None
+        reached_watermark = False
+        seen = []
         
-        while videos_processed < 100:  # Limit to prevent infinite loops
+        while not reached_watermark:
             # Request videos from channel's uploads
             request = youtube.playlistItems().list(
                 part="snippet",
@@ -54,6 +66,13 @@ def fetch_channel_videos(channel_id):
             # Process videos
             for item in response.get('items', []):
                 snippet = item['snippet']
+                video_id = snippet['resourceId']['videoId']
+                published_at = parse_published_at(snippet['publishedAt'])
+
+                if published_at < since or video_id == last_video_id:
+                    reached_watermark = True
+                    break
+                seen.append((published_at, video_id))
                 
                 # Skip private videos
                 if snippet['title'] == 'Private video':
@@ -71,86 +90,62 @@ def fetch_channel_videos(channel_id):
                     logging.info(f"Skipping non-trailer video: {snippet['title']}")
                     continue
                     
-                published_at = datetime.fromisoformat(snippet['publishedAt'].replace('Z', '+00:00'))
                 published_date = published_at.date()
+
+                # Safely extract thumbnails with a fallback
+                thumbnail_url = best_thumbnail(snippet.get('thumbnails'))
+
+                if not thumbnail_url:
+                    logging.warning(f"No thumbnail available for video ID: {video_id}")
+
+                video_data = {
+                    "title": snippet['title'],
+                    "url": f"https://www.youtube.com/watch?v={video_id}",
+                    "date": published_date.strftime('%Y-%m-%d'),
+                    "thumbnail": thumbnail_url,
+                    "description": snippet.get('description', ''),
+                    "published_at": snippet['publishedAt'],
+                    "video_id": video_id
+                }
                 
-                # Process videos from today or yesterday
-                if published_date in (today, yesterday):
-                    video_id = snippet['resourceId']['videoId']
-
-                    # Safely extract thumbnails with a fallback
-                    thumbnails = snippet.get('thumbnails', {})
-                    thumbnail_url = (
-                        thumbnails.get('high', {}).get('url') or
-                        thumbnails.get('medium', {}).get('url') or
-                        thumbnails.get('default', {}).get('url')
-                    )
-
-                    if not thumbnail_url:
-                        logging.warning(f"No thumbnail available for video ID: {video_id}")
-
-                    video_data = {
-                        "type": "trailer",
-                        "title": snippet['title'],
-                        "url": f"https://www.youtube.com/watch?v={video_id}",
-                        "date": published_date.strftime('%Y-%m-%d'),
-                        "thumbnail": thumbnail_url,
-                        "description": snippet.get('description', ''),
-                        "published_at": snippet['publishedAt']
-                    }
-                    
-                    videos.append(video_data)
-                    logging.info(f"Found recent trailer: {video_data['title']} - {video_data['url']} - Published: {published_date}")
+                videos.append(video_data)
             
-            videos_processed += len(response.get('items', []))
             next_page_token = response.get('nextPageToken')
             
             if not next_page_token:
                 break
 
+        # Durations come from one videos().list call per 50 candidates; Shorts are dropped
+        pending = []
+        videos = add_video_details(youtube, videos, pending=pending)
+        for video in videos:
+            logging.info(f"Found recent trailer: {video['title']} - {video['url']} - Published: {video['date']}")
+
         if not videos:
-            logging.info(f"No new trailers found in the last 48 hours in channel {channel_title}")
+            logging.info(f"No new trailers found since {since.isoformat()} in channel {channel_title}")
+
+        # Only staged once the whole channel was read; saved after the videos are stored
+        newest = newest_before_pending(seen, {video["video_id"] for video in pending})
+        if pending:
+            logging.info(f"Keeping the watermark of channel {channel_title} before {len(pending)} upcoming or live videos")
+        if newest:
+            watermarks.advance(channel_id, *newest)
             
         return videos
 
+    except QuotaExhausted as e:
+        # Nothing was staged, so the channel is read again from its watermark once quota is available
+        logging.warning(f"Skipping channel {channel_id}: {e}")
+        return []
     except Exception as e:
+        # The cached uploads playlist may be stale, resolve it again next run
+        youtube_metadata.invalidate(f"channel:{channel_id}")
         logging.error(f"Failed to fetch channel videos: {str(e)}")
         return []
 
 def fetch_and_store_trailers():
     """Main function to fetch and store trailer videos from multiple channels into MongoDB."""
     try:
-        all_videos = []
-        
-        # Fetch videos from each channel
-        for channel_id in TRAILER_CHANNEL_IDS:
-            logging.info(f"Fetching videos from channel: {channel_id}")
-            videos = fetch_channel_videos(channel_id)
-            all_videos.extend(videos)
-            logging.info(f"Found {len(videos)} videos in channel {channel_id}")
-
-        logging.info(f"Total videos found across all channels: {len(all_videos)}")
-        
-        # Insert videos into MongoDB
-        if all_videos:
-            # Check for duplicates before insertion
-            collection = get_collection(os.getenv("COSMOS_DB_CONTAINER_NAME"))
-            new_videos = []
-            for video in all_videos:
-                # Check if this video URL already exists in the database
-                existing = collection.find_one({"url": video["url"]})
-                if not existing:
-                    new_videos.append(video)
-                else:
-                    logging.info(f"Skipping duplicate video: {video['title']}")
-            
-            if new_videos:
-                collection.insert_many(new_videos)
-                logging.info(f"Inserted {len(new_videos)} trailers into the collection.")
-            else:
-                logging.info("No new unique trailers to insert.")
-        else:
-            logging.info(f"No new trailer videos found in the last 48 hours.")
-
+        return run_pipeline(YouTubeSource(TRAILER_CHANNEL_IDS, fetch_channel_videos, "trailer", "channel"))
     except Exception as e:
         logging.error(f"Failed to fetch and store trailers: {str(e)}")
@@ -1,34 +1,38 @@
-import os
 import logging
-from datetime import datetime, timezone, timedelta
-from googleapiclient.discovery import build
+from src.pipeline import run_pipeline, best_thumbnail
 from src.utils.constants import MUSIC_VIDEOS_CHANNEL_IDS
-from src.utils.db_connection import get_collection
+from src.utils.youtube_client import get_youtube_client, add_video_details
+from src.utils.youtube_quota import QuotaExhausted
+from src.utils.youtube_source import YouTubeSource
+from src.utils.metadata_cache import youtube_metadata
+from src.utils.watermarks import WatermarkStore, parse_published_at, is_sorted_newest_first, newest_before_pending
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
-# Set up YouTube API client
-API_KEY = os.getenv('YOUTUBE_API_KEY')
-
-def fetch_playlist_videos(playlist_id):
-    """Fetch recent videos from a playlist by playlist ID, skipping private videos."""
+def fetch_playlist_videos(playlist_id, watermarks=None):
+    """Fetch videos added to a playlist since its last watermark, skipping private videos."""
     try:
-        youtube = build('youtube', 'v3', developerKey=API_KEY)
+        youtube = get_youtube_client()
         videos = []
-        today = datetime.now(timezone.utc).date()
-        yesterday = today - timedelta(days=1)  # Look for videos from yesterday too
+        watermarks = watermarks or WatermarkStore()
+        since, last_video_id = watermarks.since(playlist_id)
         
-        # Get playlist title for better logging
-        try:
+        # Get playlist title for better logging (cached, it only feeds log lines)
+        def load_playlist():
             playlist_response = youtube.playlists().list(
                 part="snippet",
                 id=playlist_id
             ).execute()
-            
-            if playlist_response.get('items'):
-                playlist_title = playlist_response['items'][0]['snippet']['title']
-                logging.info(f"Processing playlist: {playlist_title}")
+            if not playlist_response.get('items'):
+                return None
+            return {"title": playlist_response['items'][0]['snippet']['title']}
+
+        try:
+            playlist = youtube_metadata.get_or_load(f"playlist:{playlist_id}", load_playlist)
+            if playlist:
+                playlist_title = playlist['title']
+                logging.info(f"Processing playlist: {playlist_title} (videos since {since.isoformat()})")
             else:
                 playlist_title = "Unknown playlist"
                 logging.warning(f"Could not get title for playlist ID: {playlist_id}")
@@ -36,11 +40,15 @@ def fetch_playlist_videos(playlist_id):
             playlist_title = "Error getting playlist"
             logging.error(f"Error getting playlist info: {str(e)}")
 
-        # Request videos from playlist with pagination
-        videos_processed = 0
+        # Request videos from playlist with pagination. Curated playlists are not
+        # guaranteed to be newest first, so we only stop at the watermark while the
+        # items seen so far are in descending publishedAt order. There is no page
+        # cap, so nothing newer than the watermark is left unread.
         next_page_token = None
+        reached_watermark = False
+        seen = []
         
-        while videos_processed < 100:  # Limit to prevent infinite loops
+        while not reached_watermark:
             # Request videos from playlist
             request = youtube.playlistItems().list(
                 part="snippet",
@@ -49,59 +57,74 @@ def fetch_playlist_videos(playlist_id):
                 pageToken=next_page_token
             )
             response = request.execute()
+            items = response.get('items', [])
+            newest_first = is_sorted_newest_first(items)
             
             # Process videos
-            for item in response.get('items', []):
+            for item in items:
                 snippet = item['snippet']
+                video_id = snippet['resourceId']['videoId']
+                published_at = parse_published_at(snippet['publishedAt'])
+
+                if published_at < since or video_id == last_video_id:
+                    if newest_first:
+                        reached_watermark = True
+                        break
+                    continue
+                seen.append((published_at, video_id))
                 
                 # Skip private videos
                 if snippet['title'] == 'Private video':
                     logging.info("Skipping private video")
                     continue
                     
-                published_at = datetime.fromisoformat(snippet['publishedAt'].replace('Z', '+00:00'))
                 published_date = published_at.date()
-                
-                # Process videos from today or yesterday
-                if published_date in (today, yesterday):
-                    video_id = snippet['resourceId']['videoId']
 
-                    # Safely extract thumbnails with a fallback
-                    thumbnails = snippet.get('thumbnails', {})
-                    thumbnail_url = (
-                        thumbnails.get('high', {}).get('url') or
-                        thumbnails.get('medium', {}).get('url') or
-                        thumbnails.get('default', {}).get('url')
-                    )
+                # Safely extract thumbnails with a fallback
+                thumbnail_url = best_thumbnail(snippet.get('thumbnails'))
 
-                    if not thumbnail_url:
-                        logging.warning(f"No thumbnail available for video ID: {video_id}")
+                if not thumbnail_url:
+                    logging.warning(f"No thumbnail available for video ID: {video_id}")
 
-                    video_data = {
-                        "type": "music",
-                        "title": snippet['title'],
-                        "url": f"https://www.youtube.com/watch?v={video_id}",
-                        "date": published_date.strftime('%Y-%m-%d'),
-                        "thumbnail": thumbnail_url,
-                        "insertDate": datetime.today().strftime('%Y-%m-%d'), 
-                        "description": snippet.get('description', ''),
-                        "published_at": snippet['publishedAt']
-                    }
-                    
-                    videos.append(video_data)
-                    logging.info(f"Found recent video: {video_data['title']} - {video_data['url']} - Published: {published_date}")
+                video_data = {
+                    "title": snippet['title'],
+                    "url": f"https://www.youtube.com/watch?v={video_id}",
+                    "date": published_date.strftime('%Y-%m-%d'),
+                    "thumbnail": thumbnail_url,
+                    "description": snippet.get('description', ''),
+                    "published_at": snippet['publishedAt'],
+                    "video_id": video_id
+                }
+                
+                videos.append(video_data)
             
-            videos_processed += len(response.get('items', []))
             next_page_token = response.get('nextPageToken')
             
             if not next_page_token:
                 break
 
+        # Durations come from one videos().list call per 50 candidates; Shorts are dropped
+        pending = []
+        videos = add_video_details(youtube, videos, pending=pending)
+        for video in videos:
+            logging.info(f"Found recent video: {video['title']} - {video['url']} - Published: {video['date']}")
+
         if not videos:
-            logging.info(f"No new videos found in the last 48 hours in playlist {playlist_title}")
+            logging.info(f"No new videos found since {since.isoformat()} in playlist {playlist_title}")
+
+        # Only staged once the whole playlist was read; saved after the videos are stored
+        newest = newest_before_pending(seen, {video["video_id"] for video in pending})
+        if pending:
+            logging.info(f"Keeping the watermark of playlist {playlist_title} before {len(pending)} upcoming or live videos")
+        if newest:
+            watermarks.advance(playlist_id, *newest)
             
         return videos
 
+    except QuotaExhausted as e:
+        # Nothing was staged, so the playlist is read again from its watermark once quota is available
+        logging.warning(f"Skipping playlist {playlist_id}: {e}")
+        return []
     except Exception as e:
         logging.error(f"Failed to fetch playlist videos: {str(e)}")
         return []
@@ -109,48 +132,13 @@ def fetch_playlist_videos(playlist_id):
 def fetch_and_store_music_videos():
     """Main function to fetch and store music videos from multiple playlists."""
     try:
-        all_videos = []
-        
-        # Fetch videos from each playlist
-        for playlist_id in MUSIC_VIDEOS_CHANNEL_IDS:  # Note: These are actually playlist IDs now
-            logging.info(f"Fetching videos from playlist: {playlist_id}")
-            videos = fetch_playlist_videos(playlist_id)
-            all_videos.extend(videos)
-            logging.info(f"Found {len(videos)} videos in playlist {playlist_id}")
-
-        logging.info(f"Total videos found across all playlists: {len(all_videos)}")
-        
-        # Insert videos into MongoDB
-        if all_videos:
-            collection = get_collection(os.getenv("COSMOS_DB_CONTAINER_NAME"))
-
-            # Check for duplicates before insertion
-            new_videos = []
-            for video in all_videos:
-                # Check if this video URL already exists in the database
-                existing = collection.find_one({"url": video["url"]})
-                if not existing:
-                    new_videos.append(video)
-                else:
-                    logging.info(f"Skipping duplicate video: {video['title']}")
-            
-            if new_videos:
-                collection.insert_many(new_videos)
-                logging.info(f"Inserted {len(new_videos)} music videos into the collection.")
-            else:
-                logging.info("No new unique music videos to insert.")
-        else:
-            logging.info("No new music videos found in the last 48 hours.")
-            
-        return all_videos
-
+        # Note: MUSIC_VIDEOS_CHANNEL_IDS are actually playlist IDs now
+        return run_pipeline(YouTubeSource(MUSIC_VIDEOS_CHANNEL_IDS, fetch_playlist_videos, "music", "playlist"))
     except Exception as e:
         logging.error(f"Failed to fetch and store music videos: {str(e)}")
-        return []
 
 # For testing purposes
 if __name__ == "__main__":
-    videos = fetch_and_store_music_videos()
-    if videos:
-        logging.info("Example of first video found:")
-        logging.info(videos[0])
\ No newline at end of file
+    stats = fetch_and_store_music_videos()
+    if stats:
+        logging.info(f"Music video pipeline stats: {stats}")
\ No newline at end of file
@@ -0,0 +1,231 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from src.utils import instrumentation
+from src.utils.dates import parse_datetime, utc_now
+from src.utils.db_connection import get_content_collection
+from src.utils.bulk_ingest import BulkWriter, DEFAULT_KEY_FIELDS
+from src.utils.fingerprints import FingerprintStore
+from src.utils.write_buffer import write_buffer, unsaved_writes
+from src.utils.response_cache import dashboard_cache
+
+
+class Source:
+    """A content source that yields raw documents of one ``item_type``.
+
+    Subclasses implement ``iter_items`` as a generator so documents stream into
+    the sink as they are fetched. ``on_stored`` is called with the sink's counts
+    once everything has been written, which is where sources commit their
+    bookkeeping (watermarks, feed ETags). ``write_mode`` picks the BulkWriter
+    mode; ``None`` uses the configured dedup mode, and "update" builds each
+    upsert with ``build_update``. ``published_from`` lists the fields, in order
+    of preference, that ``published_at`` is parsed from. ``fingerprinted``
+    sources skip items whose ``fingerprint_fields`` (``None``: all content
+    fields) are unchanged since the last run and only ``$set`` the fields that
+    changed.
+    """
+
+    name = "source"
+    item_type = None
+    key_fields = DEFAULT_KEY_FIELDS
+    write_mode = None
+    published_from = ("published_at", "date")
+    fingerprinted = False
+    fingerprint_fields = None
+
+    def iter_items(self):
+        raise NotImplementedError
+
+    def on_stored(self, counts):
+        pass
+
+    def build_update(self, payload):
+        raise NotImplementedError
+
+
+# Key under which a raw item lists the fields it filled with a fallback value;
+# the pipeline pops it before the document is stored
+FALLBACK_FIELDS = "_fallback_fields"
+
+
+def with_fallbacks(item, **fallbacks):
+    """Fill the fields of ``item`` that are None from ``fallbacks`` and remember which were filled.
+
+    A fallback such as today's date differs from run to run, so fallback
+    values are written only when the item is first stored and are left out
+    of its fingerprint.
+    """
+    filled = [field for field, value in fallbacks.items() if item.get(field) is None]
+    for field in filled:
+        item[field] = fallbacks[field]
+    if filled:
+        item[FALLBACK_FIELDS] = tuple(filled)
+    return item
+
+
+def best_thumbnail(thumbnails):
+    """Pick the largest available YouTube thumbnail URL."""
+    thumbnails = thumbnails or {}
+    return (
+        thumbnails.get('high', {}).get('url') or
+        thumbnails.get('medium', {}).get('url') or
+        thumbnails.get('default', {}).get('url')
+    )
+
+
+def entry_thumbnail(entry):
+    """Extract a thumbnail URL from a feedparser entry's media fields, if any."""
+    for field in ("media_thumbnail", "media_content"):
+        media = entry.get(field)
+        if media and isinstance(media, list):
+            return media[0].get("url")
+    return None
+
+
+def normalize(item, item_type, insert_date=None, ingested_at=None, published_from=Source.published_from):
+    """Stamp the fields every stored document carries.
+
+    Besides the display strings, every document gets BSON UTC datetimes:
+    ``ingested_at`` and, when a source date can be parsed, ``published_at``.
+    """
+    item["type"] = item.get("type") or item_type
+    item.setdefault("insertDate", insert_date or datetime.today().strftime('%Y-%m-%d'))
+    item.setdefault("ingested_at", ingested_at or utc_now())
+    published_at = None
+    for field in published_from:
+        published_at = parse_datetime(item.get(field))
+        if published_at is not None:
+            break
+    if published_at is not None:
+        item["published_at"] = published_at
+    else:
+        # Never leave an unparsed string behind in a datetime field
+        item.pop("published_at", None)
+    return item
+
+
+class StageTimer:
+    """Accumulates wall-clock time spent in each pipeline stage."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def _timed(iterable, timer, name):
+    """Yield from ``iterable``, charging the time spent producing each item to ``name``."""
+    iterator = iter(iterable)
+    while True:
+        with timer.stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def run_pipeline(source, collection=None, budget=None, materialize=True, replay=True):
+    """Stream a source through normalization into a batched BulkWriter.
+
+    ``budget`` is a WriteBudget shared with other pipelines running at the same
+    time. ``materialize=False`` leaves the dashboard snapshot to the caller.
+    Writes the database cannot take are kept in the local write buffer, which
+    is replayed before anything new is fetched unless ``replay`` is False
+    (callers running several pipelines replay it once themselves).
+    Returns the writer's counts along with per-stage timings.
+    """
+    timer = StageTimer()
+    insert_date = datetime.today().strftime('%Y-%m-%d')
+    ingested_at = utc_now()
+    buffer = None
+    if os.getenv("WRITE_BUFFER_ENABLED", "true").lower() == "true":
+        buffer = write_buffer
+    if buffer is not None and replay:
+        with timer.stage("replay"):
+            try:
+                buffer.replay()
+            except Exception as e:
+                logging.error(f"Failed to replay buffered writes: {e}")
+    with timer.stage("store"):
+        writer = BulkWriter(collection or get_content_collection(), key_fields=source.key_fields,
+                            mode=source.write_mode,
+                            update_builder=source.build_update if source.write_mode == "update" else None,
+                            budget=budget, buffer=buffer, item_type=source.item_type)
+
+    fingerprints = None
+    if source.fingerprinted and os.getenv("FINGERPRINTS_ENABLED", "true").lower() == "true":
+        fingerprints = FingerprintStore(source.name)
+
+    items = 0
+    try:
+        for item in _timed(source.iter_items(), timer, "fetch"):
+            with timer.stage("normalize"):
+                fallbacks = item.pop(FALLBACK_FIELDS, ())
+                document = normalize(item, source.item_type, insert_date, ingested_at, source.published_from)
+                if set(fallbacks) & set(source.published_from):
+                    # published_at may have been parsed from a fallback as well
+                    fallbacks += ("published_at",)
+            items += 1
+            status, changed = "new", None
+            if fingerprints is not None:
+                with timer.stage("fingerprint"):
+                    status, changed = fingerprints.check(document, source.key_fields, source.fingerprint_fields,
+                                                         exclude=fallbacks)
+                if status == "unchanged":
+                    writer.counts["unchanged"] += 1
+                    continue
+            with timer.stage("store"):
+                # Fingerprinted fields are $set for new items too: an item without a fingerprint
+                # may already be stored (before fingerprints, or past their TTL) with older content
+                writer.add(document, changed_fields=changed)
+    finally:
+        # Whatever was fetched before a failure is still worth storing
+        with timer.stage("store"):
+            writer.flush()
+
+    with timer.stage("commit"):
+        source.on_stored(writer.counts)
+        if fingerprints is not None:
+            if unsaved_writes(writer.counts):
+                # Failed items must be written again next run, not skipped as unchanged
+                fingerprints.discard()
+            else:
+                fingerprints.commit()
+                fingerprints.prune()
+    if writer.counts["inserted"] or writer.counts["updated"]:
+        # Cached dashboard pages of this type are stale now
+        dashboard_cache.invalidate(source.item_type)
+
+    if materialize and os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true":
+        # Imported here: the snapshot module reads the API views, which sit above the pipeline
+        from src.api.snapshot import refresh_snapshot
+        with timer.stage("materialize"):
+            try:
+                refresh_snapshot([source.item_type])
+            except Exception as e:
+                # A stale snapshot must not fail an ingest whose data is already stored
+                logging.error(f"Failed to refresh dashboard snapshot for {source.item_type}: {e}")
+
+    instrumentation.increment("items_processed", items)
+    for outcome, count in writer.counts.items():
+        instrumentation.increment(f"items_{outcome}", count)
+    for stage_name, seconds in timer.timings.items():
+        instrumentation.observe(f"pipeline.{stage_name}", seconds)
+
+    stats = {
+        "source": source.name,
+        "items": items,
+        "counts": writer.counts,
+        "timings": {stage: round(seconds, 3) for stage, seconds in timer.timings.items()},
+    }
+    logging.info(f"Pipeline {source.name}: {items} items, {writer.counts}, timings {stats['timings']}")
+    return stats
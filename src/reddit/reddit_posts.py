@@ -1,47 +1,152 @@
 import os
 import logging
+import threading
 import praw  # Reddit API wrapper
+import prawcore
 from datetime import datetime
-from src.utils.db_connection import get_collection
+from src.pipeline import Source, run_pipeline
+from src.utils import instrumentation
+from src.utils.concurrency import iter_ordered
+from src.utils.constants import SUBREDDIT_LIST, REDDIT_POST_LIMIT, REDDIT_MAX_WORKERS, REDDIT_SCORE_HISTORY_LENGTH
 
+REDDIT_URL = "https://www.reddit.com"
 
-def fetch_and_store_reddit_posts(subreddit_name, post_limit=5):
-    try:
-        # Set up Reddit client
-        reddit = praw.Reddit(
-            client_id=os.getenv('REDDIT_CLIENT_ID'),
-            client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
-            user_agent=os.getenv('REDDIT_USER_AGENT')
-        )
-        subreddit = reddit.subreddit(subreddit_name)
-        posts = subreddit.hot(limit=post_limit)
-
-        post_data = []
-        
-        for post in posts:
-             # Skip posts authored by AutoModerator
-            if str(post.author).lower() == "automoderator":
+_reddit = None
+_reddit_lock = threading.Lock()
+
+
+class SerializedRequestor(prawcore.Requestor):
+    """praw's HTTP requestor with one request in flight at a time.
+
+    praw is not thread-safe, so subreddits fetched on several threads share the
+    client through this lock; praw's own rate limiter still spaces the requests
+    according to Reddit's rate-limit headers.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def request(self, *args, **kwargs):
+        with self._lock:
+            instrumentation.increment("http_calls")
+            return super().request(*args, **kwargs)
+
+
+def get_reddit_client():
+    """Return the process-wide read-only Reddit client, creating it on first use.
+
+    The OAuth token it fetches is reused by every later call on a warm worker.
+    """
+    global _reddit
+    if _reddit is None:
+        with _reddit_lock:
+            if _reddit is None:
+                # Set up Reddit client
+                _reddit = praw.Reddit(
+                    client_id=os.getenv('REDDIT_CLIENT_ID'),
+                    client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
+                    user_agent=os.getenv('REDDIT_USER_AGENT'),
+                    requestor_class=SerializedRequestor
+                )
+    return _reddit
+
+
+def fetch_subreddit_posts(subreddit_name, post_limit=5):
+    """Hot posts of one subreddit as documents, skipping AutoModerator."""
+    subreddit = get_reddit_client().subreddit(subreddit_name)
+    posts = []
+    for post in subreddit.hot(limit=post_limit):
+         # Skip posts authored by AutoModerator
+        if str(post.author).lower() == "automoderator":
+            continue
+        image_url = post.url if post.url.endswith(('.jpg', '.png', '.gif', '.jpeg', '.img')) else None
+
+        posts.append({
+            "title": post.title,
+            "url": post.url,
+            # Posts are deduplicated on their id, which unlike the linked url is unique per post
+            "post_id": post.id,
+            "permalink": f"{REDDIT_URL}{post.permalink}",
+            "published_at": post.created_utc,
+            "score": post.score,
+            "date": datetime.today().strftime('%Y-%m-%d'),
+            "subreddit": post.subreddit.display_name,
+            "author": str(post.author),
+            "selftext": post.selftext,
+            "image_url": image_url
+        })
+    return posts
+
+
+def score_refresh_enabled():
+    return os.getenv("REDDIT_SCORE_REFRESH", "true").lower() == "true"
+
+
+class RedditSource(Source):
+    """Hot posts of several subreddits fetched concurrently on one shared client.
+
+    With ``refresh_scores`` a post is inserted in full the first time it is seen;
+    later runs only ``$set`` its score and, when ``history_length`` is non-zero,
+    append ``{date, score}`` to a ``score_history`` capped at that many entries.
+    Without it, posts already stored are left untouched.
+    """
+
+    name = "reddit"
+    item_type = "reddit"
+    key_fields = ("type", "post_id")
+
+    def __init__(self, subreddit_names, post_limit=5, refresh_scores=True, history_length=0):
+        self.subreddit_names = list(subreddit_names)
+        self.post_limit = post_limit
+        self.max_workers = int(os.getenv("REDDIT_MAX_WORKERS", REDDIT_MAX_WORKERS))
+        self.write_mode = "update" if refresh_scores else None
+        self.history_length = history_length
+
+    def build_update(self, payload):
+        # The body (title, selftext, ...) is only written when the post is new
+        body = {k: v for k, v in payload.items() if k != "score"}
+        update = {
+            "$setOnInsert": body,
+            "$set": {"score": payload["score"], "score_date": payload["date"]},
+        }
+        if self.history_length:
+            entry = {"date": payload["date"], "score": payload["score"]}
+            update["$push"] = {"score_history": {"$each": [entry], "$slice": -self.history_length}}
+        return update
+
+    def iter_items(self):
+        results = iter_ordered(lambda name: fetch_subreddit_posts(name, self.post_limit), self.subreddit_names,
+                               max_workers=self.max_workers, label="subreddit")
+        for subreddit_name, posts, error in results:
+            if error:
                 continue
-            image_url = post.url if post.url.endswith(('.jpg', '.png', '.gif', '.jpeg', '.img')) else None
-
-            post_info = {
-                "type": "reddit",
-                "title": post.title,
-                "url": post.url,
-                "score": post.score,
-                "date": datetime.today().strftime('%Y-%m-%d'),  
-                "subreddit": post.subreddit.display_name,
-                "author": str(post.author),
-                "selftext": post.selftext,
-                "image_url": image_url
-            }
-            post_data.append(post_info)
-
-        if post_data:
-            collection = get_collection(os.getenv("COSMOS_DB_CONTAINER_NAME"))
-            collection.insert_many(post_data)
-            logging.info(f"Inserted {len(post_data)} posts into the 'RedditPosts' collection.")
+            logging.info(f"Found {len(posts)} posts in r/{subreddit_name}")
+            yield from posts
+
+
+def fetch_and_store_subreddits(subreddit_names=None, post_limit=None, refresh_scores=None):
+    """Store the hot posts of every subreddit in ``SUBREDDIT_LIST`` (or the given names).
+
+    Scores of posts already stored are refreshed unless ``refresh_scores`` is
+    False (default from REDDIT_SCORE_REFRESH).
+    """
+    subreddit_names = subreddit_names or SUBREDDIT_LIST
+    post_limit = post_limit or int(os.getenv("REDDIT_POST_LIMIT", REDDIT_POST_LIMIT))
+    if refresh_scores is None:
+        refresh_scores = score_refresh_enabled()
+    history_length = int(os.getenv("REDDIT_SCORE_HISTORY_LENGTH", REDDIT_SCORE_HISTORY_LENGTH))
+    try:
+        stats = run_pipeline(RedditSource(subreddit_names, post_limit, refresh_scores, history_length))
+        if stats["items"]:
+            logging.info(f"Inserted {stats['counts']['inserted']} posts and refreshed {stats['counts']['updated']} "
+                         f"scores in the 'RedditPosts' collection.")
         else:
             logging.info("No posts found.")
+        return stats
     except Exception as e:
         logging.error(f"Fetch from Reddit failed: {str(e)}")
+
+
+def fetch_and_store_reddit_posts(subreddit_name, post_limit=5, refresh_scores=None):
+    return fetch_and_store_subreddits([subreddit_name], post_limit, refresh_scores)
@@ -0,0 +1,253 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from src.utils import instrumentation
+from src.utils.schema import dedup_mode
+from src.utils.db_connection import run_with_retry, is_throttled, backoff_delay, TRANSIENT_ERRORS
+
+# Matches the unique (type, url) index created by src.utils.schema
+DEFAULT_KEY_FIELDS = ("type", "url")
+DUPLICATE_KEY_ERROR = 11000
+
+# Default number of documents sent to MongoDB in a single bulk_write call
+DEFAULT_BATCH_SIZE = 100
+
+# Fields "set" mode writes only when the document is first created
+INSERT_ONLY_FIELDS = ("insertDate", "ingested_at")
+
+
+def to_operation(spec):
+    """The pymongo bulk operation for an operation spec built by BulkWriter."""
+    if spec["op"] == "insert":
+        return InsertOne(spec["document"])
+    return UpdateOne(spec["filter"], spec["update"], upsert=spec.get("upsert", True))
+
+
+def write_specs(collection, specs, attempts=3):
+    """Bulk write operation specs unordered, resending only the throttled ones with backoff.
+
+    Cosmos DB reports throttling inside a bulk call per operation (code 16500)
+    while the rest of the batch is written, so up to ``attempts`` calls are
+    made, each with just the operations throttled by the previous one. Returns
+    ``inserted`` and ``updated`` counts, the other ``errors`` (duplicate keys
+    excluded) and the specs still ``throttled`` after the last attempt. Errors
+    of the call as a whole are retried by run_with_retry and then raised.
+    """
+    outcome = {"inserted": 0, "updated": 0, "errors": [], "throttled": []}
+    for attempt in range(1, attempts + 1):
+        operations = [to_operation(spec) for spec in specs]
+        try:
+            result = run_with_retry(lambda: collection.bulk_write(operations, ordered=False))
+            outcome["inserted"] += result.upserted_count + result.inserted_count
+            outcome["updated"] += result.modified_count
+            return outcome
+        except BulkWriteError as e:
+            details = e.details or {}
+            outcome["inserted"] += details.get("nUpserted", 0) + details.get("nInserted", 0)
+            outcome["updated"] += details.get("nModified", 0)
+            errors = details.get("writeErrors", [])
+            throttled = [error for error in errors if is_throttled(error)]
+            outcome["errors"] += [error for error in errors
+                                  if not is_throttled(error) and error.get("code") != DUPLICATE_KEY_ERROR]
+            if not throttled:
+                return outcome
+            specs = [specs[error["index"]] for error in throttled]
+            if attempt == attempts:
+                outcome["throttled"] = specs
+                return outcome
+            instrumentation.increment("db_throttled")
+            delay = backoff_delay(throttled[0], attempt)
+            logging.warning(f"{len(specs)} bulk writes throttled (attempt {attempt}/{attempts}), "
+                            f"resending in {delay:.1f}s")
+            time.sleep(delay)
+
+
+class WriteBudget:
+    """Paces bulk writes from several sources against one request-unit budget.
+
+    Cosmos DB bills each write in request units (RUs). Writers sharing a budget
+    take turns, ``max_concurrent_writes`` bulk calls at a time, and a call whose
+    estimated charge exceeds what has refilled since the last one waits for the
+    difference instead of being throttled by the server. ``units_per_second``
+    of ``None`` or 0 only serializes the writes.
+    """
+
+    def __init__(self, units_per_second, units_per_write=10, max_concurrent_writes=1):
+        self.units_per_second = units_per_second
+        self.units_per_write = units_per_write
+        self._available = units_per_second or 0
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent_writes)
+        self.stats = {"writes": 0, "estimated_units": 0, "waited_seconds": 0.0}
+
+    def _reserve(self, units):
+        """Take ``units`` from the bucket; returns how long to wait before spending them."""
+        with self._lock:
+            self.stats["writes"] += 1
+            self.stats["estimated_units"] += units
+            if not self.units_per_second:
+                return 0.0
+            now = time.monotonic()
+            self._available = min(self.units_per_second,
+                                  self._available + (now - self._refilled) * self.units_per_second)
+            self._refilled = now
+            # Large batches may overdraw the bucket; the debt is paid back by waiting
+            self._available -= units
+            wait = max(0.0, -self._available / self.units_per_second)
+            self.stats["waited_seconds"] += wait
+            return wait
+
+    @contextmanager
+    def write(self, operations):
+        """Hold a write slot for a bulk call of ``operations`` documents."""
+        with self._slots:
+            wait = self._reserve(operations * self.units_per_write)
+            if wait:
+                time.sleep(wait)
+            yield
+
+
+def _empty_counts():
+    # "invalid" items lack a key field and can never be written, unlike "failed" ones;
+    # "unchanged" items matched their fingerprint and never reached the writer;
+    # "buffered" writes were throttled or hit an outage and wait in the local write buffer
+    return {"inserted": 0, "updated": 0, "skipped": 0, "failed": 0, "invalid": 0, "unchanged": 0, "buffered": 0}
+
+
+class BulkWriter:
+    """Collect documents and write them in unordered batches.
+
+    In "upsert" mode each document becomes an
+    ``UpdateOne(filter, {"$setOnInsert": doc}, upsert=True)`` keyed on ``key_fields``,
+    so documents that already exist are left untouched and counted as skipped instead
+    of costing a ``find_one`` round trip per item. In "insert" mode documents are
+    inserted blindly and the unique index rejects duplicates, which are counted as
+    skipped from the duplicate-key errors. In "set" mode documents are upserted with
+    ``$set`` so a re-fetch overwrites the stored values (e.g. a forecast revised since
+    the last run); unchanged documents are counted as skipped. In "update" mode
+    ``update_builder(payload)`` returns the update document for each upsert, for
+    sources that refresh only some fields of documents already stored.
+
+    Documents added with ``changed_fields`` are written as a targeted upsert in
+    any mode: ``$set`` of just those fields, ``$setOnInsert`` of the rest.
+
+    Writers given the same ``budget`` (a WriteBudget) share its pacing. With a
+    ``buffer`` (a WriteBuffer), writes that are still throttled after being resent
+    with backoff, or that fail because the database is unreachable, are saved there for a later
+    replay and counted as buffered instead of failed.
+    """
+
+    def __init__(self, collection, key_fields=DEFAULT_KEY_FIELDS, batch_size=DEFAULT_BATCH_SIZE, mode=None,
+                 update_builder=None, budget=None, buffer=None, item_type=None):
+        self.collection = collection
+        self.budget = budget
+        self.buffer = buffer
+        self.item_type = item_type
+        self.key_fields = tuple(key_fields)
+        self.batch_size = batch_size
+        self.update_builder = update_builder
+        self.mode = mode or ("update" if update_builder else dedup_mode(collection))
+        self.counts = _empty_counts()
+        self._pending = []
+        self._targeted = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+    def add(self, item, changed_fields=None):
+        """Queue a document, flushing when the batch is full."""
+        key = {field: item.get(field) for field in self.key_fields}
+        if any(value is None for value in key.values()):
+            logging.warning(f"Skipping item without {', '.join(self.key_fields)}: {item.get('title')}")
+            self.counts["invalid"] += 1
+            return
+        if changed_fields:
+            self._targeted.append((item, tuple(changed_fields)))
+        else:
+            self._pending.append(item)
+        if len(self._pending) + len(self._targeted) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, items):
+        for item in items:
+            self.add(item)
+
+    # Operations are built as plain specs so the write buffer can store them
+    def _build_operation(self, item):
+        if self.mode == "insert":
+            # InsertOne mutates its document by adding _id, keep callers' dicts clean
+            return {"op": "insert", "document": dict(item)}
+        key = {field: item[field] for field in self.key_fields}
+        # Equality fields from the filter are copied into the inserted document
+        payload = {k: v for k, v in item.items() if k not in self.key_fields}
+        if self.mode == "update":
+            return {"op": "update", "filter": key, "update": self.update_builder(payload)}
+        if self.mode == "set":
+            update = {"$set": {k: v for k, v in payload.items() if k not in INSERT_ONLY_FIELDS}}
+            on_insert = {k: payload[k] for k in INSERT_ONLY_FIELDS if k in payload}
+            if on_insert:
+                update["$setOnInsert"] = on_insert
+            return {"op": "update", "filter": key, "update": update}
+        return {"op": "update", "filter": key, "update": {"$setOnInsert": payload}}
+
+    def _build_targeted(self, item, changed_fields):
+        key = {field: item[field] for field in self.key_fields}
+        update = {"$set": {field: item.get(field) for field in changed_fields}}
+        on_insert = {k: v for k, v in item.items() if k not in self.key_fields and k not in changed_fields}
+        if on_insert:
+            update["$setOnInsert"] = on_insert
+        return {"op": "update", "filter": key, "update": update}
+
+    def _write_slot(self, operations):
+        return self.budget.write(operations) if self.budget else nullcontext()
+
+    def flush(self):
+        """Write all queued documents in a single unordered bulk call (two with targeted updates)."""
+        if self._pending:
+            batch, self._pending = self._pending, []
+            # Upserts with $setOnInsert are idempotent and inserts are guarded by the
+            # unique index, so resending is safe
+            self._write([self._build_operation(item) for item in batch])
+        if self._targeted:
+            batch, self._targeted = self._targeted, []
+            self._write([self._build_targeted(item, fields) for item, fields in batch])
+
+    def _buffer(self, specs, error):
+        """Hand writes the database could not take to the write buffer; False when there is none."""
+        if self.buffer is None or not specs:
+            return False
+        try:
+            self.counts["buffered"] += self.buffer.append(self.collection.name, specs, self.item_type, error)
+            return True
+        except Exception as e:
+            logging.error(f"Could not buffer {len(specs)} writes locally: {e}")
+            return False
+
+    def _write(self, specs):
+        """Write ``specs`` in one bulk call (plus resends of throttled ones) and add the outcome to the counts."""
+        size = len(specs)
+        try:
+            with self._write_slot(size):
+                outcome = write_specs(self.collection, specs)
+            throttled = len(outcome["throttled"])
+            if throttled and not self._buffer(outcome["throttled"], "still throttled after resending"):
+                self.counts["failed"] += throttled
+            self.counts["inserted"] += outcome["inserted"]
+            self.counts["updated"] += outcome["updated"]
+            self.counts["failed"] += len(outcome["errors"])
+            self.counts["skipped"] += size - outcome["inserted"] - outcome["updated"] - len(outcome["errors"]) - throttled
+            if outcome["errors"]:
+                logging.error(f"Bulk write completed with {len(outcome['errors'])} errors: {outcome['errors'][:3]}")
+        except Exception as e:
+            if (is_throttled(e) or isinstance(e, TRANSIENT_ERRORS)) and self._buffer(specs, e):
+                return
+            self.counts["failed"] += size
+            logging.error(f"Bulk write of {size} items failed: {e}")
@@ -0,0 +1,78 @@
+import time
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# How often the collector wakes up to check for sources that exceeded their timeout
+POLL_INTERVAL_SECONDS = 0.25
+
+
+def iter_completed(func, sources, max_workers=4, timeout=None):
+    """Run ``func(source)`` for each source on a bounded thread pool.
+
+    Yields ``(index, source, result, error, elapsed)`` tuples as sources finish.
+    ``timeout`` applies per source from the moment it starts running; a source that
+    exceeds it is yielded with a ``TimeoutError`` and abandoned so it cannot stall
+    the caller. Blocked threads cannot be killed, so they finish in the background.
+    """
+    sources = list(sources)
+    if not sources:
+        return
+    started = {}
+
+    def run(index, source):
+        started[index] = time.monotonic()
+        return func(source)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources))))
+    try:
+        # Each worker runs in a copy of the caller's context so per-invocation
+        # instrumentation follows the work onto the pool threads
+        futures = {executor.submit(contextvars.copy_context().run, run, i, source): i
+                   for i, source in enumerate(sources)}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=POLL_INTERVAL_SECONDS, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in done:
+                index = futures[future]
+                elapsed = now - started.get(index, now)
+                error = future.exception()
+                result = None if error else future.result()
+                yield index, sources[index], result, error, elapsed
+
+            if timeout is None:
+                continue
+            for future in list(pending):
+                index = futures[future]
+                if index in started and now - started[index] > timeout:
+                    pending.discard(future)
+                    future.cancel()
+                    error = TimeoutError(f"timed out after {timeout}s")
+                    yield index, sources[index], None, error, now - started[index]
+    finally:
+        # Do not wait for abandoned sources; queued ones that never started are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_ordered(func, sources, max_workers=4, timeout=None, label="source", errors=None):
+    """Like ``iter_completed`` but yields ``(source, result, error)`` in source order.
+
+    Results are released as soon as every earlier source has finished, so callers
+    can stream them while keeping a deterministic merge order. Failures and
+    timeouts are logged here and yielded with ``result`` set to ``None``; when
+    ``errors`` is a dict they are also collected into it by source.
+    """
+    buffered = {}
+    next_index = 0
+    for index, source, result, error, elapsed in iter_completed(func, sources, max_workers, timeout):
+        if error:
+            logging.error(f"Fetching {label} {source} failed after {elapsed:.1f}s: {error}")
+            if errors is not None:
+                errors[source] = error
+        else:
+            logging.info(f"Fetched {label} {source} in {elapsed:.1f}s")
+        buffered[index] = (source, result, error)
+        while next_index in buffered:
+            yield buffered.pop(next_index)
+            next_index += 1
@@ -1,6 +1,7 @@
 WEATHER_ZIP_CODE= 43017
 SUBREDDIT_LIST = ["azure", "csharp", "nostalgia", "movies", "aww", "investing"]
 NEWS_URL = 'https://news.mit.edu/rss/feed'
+NEWS_URLS = [NEWS_URL]
 LAT=40.1157
 LON=-83.1327
 WEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5/forecast"
@@ -9,3 +10,71 @@ MUSIC_VIDEOS_CHANNEL_IDS = ["PL1B627337ED6F55F0","PLUh4W61bt_K6tflBpjWgnXLpyuu6E
 PF_RSS_URLS = [
     "https://pitchfork.com/feed/feed-news/rss"
 ]
+# Bounded fan-out for YouTube channel/playlist fetching (overridable via env vars)
+YOUTUBE_MAX_WORKERS = 4
+YOUTUBE_SOURCE_TIMEOUT_SECONDS = 60
+# Incremental YouTube polling: how far back a missed run catches up, and the uploads per
+# source and day assumed when planning quota (sources are read up to their watermark regardless)
+YOUTUBE_MAX_CATCHUP_DAYS = 7
+YOUTUBE_ITEMS_PER_DAY_ESTIMATE = 50
+# How long channel uploads playlist IDs and playlist titles are cached
+YOUTUBE_METADATA_TTL_HOURS = 168
+# Socket timeout for YouTube Data API calls
+YOUTUBE_HTTP_TIMEOUT_SECONDS = 30
+# Timeout for downloading RSS feeds
+FEED_HTTP_TIMEOUT_SECONDS = 30
+# Parallel feed ingestion: download pool size, per-feed timeout and "slow feed" threshold
+FEED_MAX_WORKERS = 8
+FEED_TIMEOUT_SECONDS = 60
+FEED_SLOW_SECONDS = 10
+# Shared HTTP client: connect/read timeouts, retries with backoff, pool size and per-host concurrency
+HTTP_CONNECT_TIMEOUT_SECONDS = 5
+HTTP_READ_TIMEOUT_SECONDS = 30
+HTTP_MAX_ATTEMPTS = 3
+HTTP_BACKOFF_BASE_SECONDS = 0.5
+HTTP_BACKOFF_MAX_SECONDS = 30
+HTTP_POOL_SIZE = 20
+HTTP_MAX_PER_HOST = 4
+# Weather: current conditions endpoint, locations to ingest ((lat, lon) pairs) and fetch fan-out
+WEATHER_CURRENT_URL = "https://api.openweathermap.org/data/2.5/weather"
+WEATHER_LOCATIONS = [(LAT, LON)]
+WEATHER_MAX_WORKERS = 4
+# Reddit: hot posts per subreddit and how many subreddits are fetched at once
+REDDIT_POST_LIMIT = 5
+REDDIT_MAX_WORKERS = 3
+# Score entries kept per stored Reddit post when scores are refreshed (0 disables the history)
+REDDIT_SCORE_HISTORY_LENGTH = 0
+# Dashboard read API: page sizes and the in-process response cache
+API_DEFAULT_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_CACHE_TTL_SECONDS = 300
+API_CACHE_MAX_ENTRIES = 256
+# Items per type in the precomputed daily dashboard snapshot
+SNAPSHOT_TOP_N = 10
+# Documents read and updated per batch by the retention trigger
+RETENTION_BATCH_SIZE = 100
+# Documents the retention trigger deletes or compacts at most per run
+RETENTION_MAX_DOCUMENTS_PER_RUN = 5000
+# Documents rewritten per bulk write by the date backfill
+MIGRATION_BATCH_SIZE = 200
+# YouTube Data API units available per Pacific day, and units held back from scheduled ingestion
+YOUTUBE_DAILY_QUOTA = 10000
+YOUTUBE_QUOTA_RESERVE = 500
+# Channel/playlist ID -> priority when quota runs low (lower is fetched first)
+YOUTUBE_SOURCE_PRIORITIES = {}
+YOUTUBE_DEFAULT_PRIORITY = 100
+# Videos this short or shorter are Shorts and are not ingested
+YOUTUBE_SHORTS_MAX_SECONDS = 60
+# Coordinated ingest run: sources in run order, how many run at once, and the shared write budget
+INGEST_SOURCES = ["news", "trailers", "music"]
+INGEST_MAX_PARALLEL_SOURCES = 2
+# Request units per second the ingest run may spend on writes, and the estimated charge per document written
+INGEST_RU_PER_SECOND = 1000
+INGEST_RU_PER_WRITE = 10
+# Days an item's content fingerprint is trusted before the item is checked against the database again
+FINGERPRINT_TTL_DAYS = 7
+# Local write buffer: operations per bulk call when replaying, and attempts per call while throttled
+WRITE_BUFFER_FLUSH_SIZE = 500
+WRITE_BUFFER_MAX_ATTEMPTS = 5
+# Hours after which another instance adopts and replays a buffer file its instance stopped replaying
+WRITE_BUFFER_ORPHAN_HOURS = 24
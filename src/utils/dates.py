@@ -0,0 +1,43 @@
+import email.utils
+from datetime import datetime, date, timezone
+
+
+def to_utc(moment):
+    """Aware UTC datetime; naive values are taken to be UTC already."""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def parse_datetime(value):
+    """Parse any date the fetchers see into an aware UTC datetime, or None.
+
+    Handles datetimes, epoch seconds (Reddit), ISO 8601 with or without ``Z``
+    (YouTube, feedparser fallbacks), RFC 822 (RSS ``published``) and plain
+    ``%Y-%m-%d`` strings, which become midnight UTC.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return to_utc(value)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    try:
+        return to_utc(datetime.fromisoformat(text.replace('Z', '+00:00')))
+    except ValueError:
+        pass
+    try:
+        return to_utc(email.utils.parsedate_to_datetime(text))
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def utc_now():
+    # BSON datetimes have millisecond precision; truncate so stored and in-memory values compare equal
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
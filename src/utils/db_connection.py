@@ -1,35 +1,230 @@
 import os
-from pymongo import MongoClient
+import re
+import time
+import random
 import logging
+import threading
+from urllib.parse import urlsplit, parse_qs
+from pymongo import MongoClient, monitoring
+from pymongo.errors import (AutoReconnect, ConnectionFailure, ServerSelectionTimeoutError, OperationFailure,
+                            BulkWriteError)
+from src.utils.schema import bootstrap_collection
+from src.utils import instrumentation
 
 # Get MongoDB connection string and database details
 connection_string = os.getenv("COSMOS_DB_CONNECTION_STRING", "mongodb://mongodb:27017")
 database_name = os.getenv("COSMOS_DB_DATABASE_NAME", "test-db")  # Default to 'dashboard' if not specified
 
-# Create MongoDB client and database reference
-try:
-    client = MongoClient(connection_string)
-    
-    # Quick test of the connection
-    client.server_info()
-    
-    db = client[database_name]
-    logging.info(f"Connected to MongoDB database: {database_name}")
-except Exception as e:
-    logging.error(f"Failed to connect to MongoDB: {str(e)}")
-    # Still create client and db variables to avoid NameError
-    client = None
-    db = None
+# Pool sizing and timeouts suited to Cosmos DB's Mongo API. Cosmos drops idle
+# connections, so idle sockets are recycled early, and it does not support
+# retryable writes.
+CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", 20)),
+    "minPoolSize": 0,
+    "maxIdleTimeMS": 120000,
+    "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 10000)),
+    "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000)),
+    "socketTimeoutMS": int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 30000)),
+    "retryWrites": False,
+    "appname": "dashboard-azure-functions",
+}
+
+# Connection-level errors worth retrying
+TRANSIENT_ERRORS = (AutoReconnect, ConnectionFailure, ServerSelectionTimeoutError)
+
+# Cosmos DB rejects requests over the provisioned RUs with error 16500 (HTTP 429)
+# and says how long to wait in a RetryAfterMs hint
+THROTTLED_ERROR_CODE = 16500
+_RETRY_AFTER = re.compile(r"RetryAfterMs=(\d+)")
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool events aggregated into acquisition timing counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections_created = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.checkout_seconds = 0.0
+            self.max_checkout_seconds = 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connections_created": self.connections_created,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_checkout_ms": round(1000 * self.checkout_seconds / self.checkouts, 2) if self.checkouts else 0.0,
+                "max_checkout_ms": round(1000 * self.max_checkout_seconds, 2),
+            }
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_checked_out(self, event):
+        # ``duration`` is reported by pymongo 4.7+; older drivers only count checkouts
+        duration = getattr(event, "duration", None) or 0.0
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_seconds += duration
+            self.max_checkout_seconds = max(self.max_checkout_seconds, duration)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_checked_in(self, event): pass
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Counts database round trips and their latency on the active invocation."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        instrumentation.increment("db_round_trips")
+        instrumentation.observe(f"db.{event.command_name}", event.duration_micros / 1e6)
+
+    def failed(self, event):
+        instrumentation.increment("db_round_trips")
+        instrumentation.increment("db_errors")
+        instrumentation.observe(f"db.{event.command_name}", event.duration_micros / 1e6)
+
+
+def _client_options():
+    """CLIENT_OPTIONS minus anything already set in the connection string's query."""
+    uri_options = {key.lower() for key in parse_qs(urlsplit(connection_string).query)}
+    return {key: value for key, value in CLIENT_OPTIONS.items() if key.lower() not in uri_options}
+
+
+pool_metrics = PoolMetrics()
+command_metrics = CommandMetrics()
+_client = None
+_client_lock = threading.Lock()
+_client_stats = {"clients_created": 0, "last_create_ms": None}
+
+
+def get_client():
+    """Return the process-wide MongoClient, creating it on first use.
+
+    Creating the client does not contact the server; the first operation does.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                start = time.perf_counter()
+                _client = MongoClient(connection_string, event_listeners=[pool_metrics, command_metrics], **_client_options())
+                _client_stats["clients_created"] += 1
+                _client_stats["last_create_ms"] = round(1000 * (time.perf_counter() - start), 2)
+                logging.info(f"Created MongoDB client for database: {database_name}")
+    return _client
+
+
+def set_client(client):
+    """Use an existing client (e.g. a local stand-in for benchmarks)."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def get_database():
+    return get_client()[database_name]
+
+
+def is_throttled(error):
+    """True for a Cosmos DB "request rate is large" error, or a bulk write error entry of one.
+
+    A BulkWriteError is never throttled as a whole: its throttled entries are
+    handled one by one, since the rest of the batch was written.
+    """
+    if isinstance(error, dict):
+        return error.get("code") == THROTTLED_ERROR_CODE
+    if isinstance(error, BulkWriteError):
+        return False
+    return (getattr(error, "code", None) == THROTTLED_ERROR_CODE
+            or (isinstance(error, OperationFailure) and "TooManyRequests" in str(error)))
+
+
+def backoff_delay(error, attempt, base_delay=0.5):
+    """Seconds to wait before retry ``attempt``: the server's RetryAfterMs hint, else jittered backoff."""
+    match = _RETRY_AFTER.search(str(error))
+    if match:
+        return int(match.group(1)) / 1000
+    return base_delay * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+
+
+def run_with_retry(operation, attempts=3, base_delay=0.5):
+    """Run ``operation()`` retrying transient connection errors and throttling with backoff.
+
+    The driver clears broken pool connections and re-establishes them on the next
+    attempt, so a connection that went bad during a warm worker's lifetime does
+    not poison later operations. Throttled requests wait as long as Cosmos DB
+    asks before retrying.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return operation()
+        except TRANSIENT_ERRORS as e:
+            if attempt == attempts:
+                raise
+            delay = backoff_delay(e, attempt, base_delay)
+            logging.warning(f"Transient MongoDB error (attempt {attempt}/{attempts}), retrying in {delay:.1f}s: {e}")
+            time.sleep(delay)
+        except OperationFailure as e:
+            if not is_throttled(e) or attempt == attempts:
+                raise
+            instrumentation.increment("db_throttled")
+            delay = backoff_delay(e, attempt, base_delay)
+            logging.warning(f"MongoDB request throttled (attempt {attempt}/{attempts}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def ping():
+    """Health probe: round-trip a ping and report latency plus connection metrics."""
+    start = time.perf_counter()
+    try:
+        run_with_retry(lambda: get_client().admin.command("ping"), attempts=2)
+        result = {"ok": True}
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    result["latency_ms"] = round(1000 * (time.perf_counter() - start), 2)
+    result["client"] = dict(_client_stats)
+    result["pool"] = pool_metrics.snapshot()
+    return result
+
 
 # Function to get a collection by name
 def get_collection(collection_name):
-    if db is None:
-        logging.error("Database connection is not established. Cannot get collection.")
-        raise ConnectionError("MongoDB connection is not established.")
-    
     # If collection name is None, use a default
     if collection_name is None:
         collection_name = "items"
         logging.warning(f"No collection name provided, using default: {collection_name}")
-    
-    return db[collection_name]
+
+    collection = get_database()[collection_name]
+
+    # Indexes on the shared content container are ensured once per worker (cold start)
+    content_container = os.getenv("COSMOS_DB_CONTAINER_NAME", "items")
+    if collection_name == content_container and os.getenv("SCHEMA_BOOTSTRAP", "true").lower() == "true":
+        bootstrap_collection(collection)
+
+    return collection
+
+
+def get_content_collection():
+    """Return the shared container every fetcher writes its items into."""
+    return get_collection(os.getenv("COSMOS_DB_CONTAINER_NAME"))
@@ -0,0 +1,75 @@
+import json
+import hashlib
+import logging
+from datetime import datetime, timezone, timedelta
+from src.utils.state_store import StateStore
+from src.utils.db_connection import run_with_retry
+from src.utils.constants import FINGERPRINT_TTL_DAYS
+
+# Bookkeeping fields stamped on every document, which say nothing about its content
+NON_CONTENT_FIELDS = ("_id", "type", "insertDate", "ingested_at")
+
+
+def _digest(value, length):
+    text = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:length]
+
+
+def fingerprint(document, fields):
+    """Short hashes of each field in ``fields`` (missing fields hash as null)."""
+    return {field: _digest(document.get(field), 12) for field in fields}
+
+
+class FingerprintStore(StateStore):
+    """Hashes of the content fields of every item a source stored recently.
+
+    Each item is one small document keyed by a hash of its key fields, all
+    loaded with one query when the run starts. An item whose hashes match
+    needs no database work at all; one whose hashes differ only needs the
+    fields that changed. New and changed fingerprints are staged and committed
+    once the items are stored. Fingerprints older than ``ttl_days`` are ignored
+    and pruned, so items that left their feed do not accumulate and every item
+    is checked against the database again now and then.
+    """
+
+    def __init__(self, source_name, collection=None, ttl_days=FINGERPRINT_TTL_DAYS):
+        super().__init__(f"fingerprint:{source_name}", collection=collection)
+        self.ttl_days = ttl_days
+
+    def _cutoff(self):
+        return datetime.now(timezone.utc) - timedelta(days=self.ttl_days)
+
+    def check(self, document, key_fields, fields=None, exclude=()):
+        """Classify a document as "new", "unchanged" or "changed".
+
+        Returns ``(status, changed_fields)``. ``fields`` defaults to every field
+        except the key and bookkeeping ones; fields in ``exclude`` (fallback
+        values) are never compared, so they are never reported as changed.
+        New and changed documents have their fingerprint staged.
+        """
+        if fields is None:
+            fields = sorted(field for field in document if field not in NON_CONTENT_FIELDS + tuple(key_fields))
+        fields = [field for field in fields if field not in exclude]
+        key = _digest([document.get(field) for field in key_fields], 20)
+        hashes = fingerprint(document, fields)
+        stored = self.get(key)
+        if stored and stored.get("updated_at") is not None and stored["updated_at"].replace(tzinfo=timezone.utc) < self._cutoff():
+            stored = None
+        if not stored:
+            status, changed = "new", tuple(fields)
+        else:
+            changed = tuple(field for field in fields if stored.get("fields", {}).get(field) != hashes[field])
+            status = "changed" if changed else "unchanged"
+        if changed:
+            self.stage(key, {"fields": hashes, "updated_at": datetime.now(timezone.utc)})
+        return status, changed
+
+    def prune(self):
+        """Delete fingerprints past their TTL; returns how many were removed."""
+        try:
+            result = run_with_retry(lambda: self.collection.delete_many(
+                {"namespace": self.namespace, "updated_at": {"$lt": self._cutoff()}}))
+            return result.deleted_count
+        except Exception as e:
+            logging.error(f"Failed to prune fingerprints '{self.namespace}': {e}")
+            return 0
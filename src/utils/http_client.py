@@ -0,0 +1,146 @@
+import os
+import time
+import random
+import logging
+import threading
+import email.utils
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from src.utils import instrumentation
+from src.utils.constants import (HTTP_CONNECT_TIMEOUT_SECONDS, HTTP_READ_TIMEOUT_SECONDS, HTTP_MAX_ATTEMPTS,
+                                 HTTP_BACKOFF_BASE_SECONDS, HTTP_BACKOFF_MAX_SECONDS, HTTP_MAX_PER_HOST,
+                                 HTTP_POOL_SIZE)
+
+# Responses worth retrying; anything else is returned to the caller as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Only idempotent requests are retried
+RETRY_METHODS = {"GET", "HEAD"}
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+USER_AGENT = "dashboard-azure-functions"
+
+_session = None
+_session_lock = threading.Lock()
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide requests Session, creating it on first use.
+
+    The session keeps connections alive between calls and between invocations
+    on a warm worker, so repeat requests to the same host skip the TCP/TLS handshake.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = int(os.getenv("HTTP_POOL_SIZE", HTTP_POOL_SIZE))
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                _session = session
+    return _session
+
+
+def _host_slot(host):
+    """Semaphore bounding concurrent requests to one host."""
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(int(os.getenv("HTTP_MAX_PER_HOST", HTTP_MAX_PER_HOST)))
+        return _host_slots[host]
+
+
+def default_timeout():
+    return (float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", HTTP_CONNECT_TIMEOUT_SECONDS)),
+            float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", HTTP_READ_TIMEOUT_SECONDS)))
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """Full-jitter exponential backoff for the given 1-based attempt."""
+    base = base if base is not None else float(os.getenv("HTTP_BACKOFF_BASE_SECONDS", HTTP_BACKOFF_BASE_SECONDS))
+    cap = cap if cap is not None else float(os.getenv("HTTP_BACKOFF_MAX_SECONDS", HTTP_BACKOFF_MAX_SECONDS))
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def request(method, url, timeout=None, attempts=None, **kwargs):
+    """Send a request through the shared session.
+
+    Connection errors, timeouts and 429/5xx responses to GET/HEAD requests are
+    retried with jittered exponential backoff; a ``Retry-After`` header on the
+    response takes precedence over the computed delay. At most
+    ``HTTP_MAX_PER_HOST`` requests run against one host at a time across all
+    threads. ``timeout`` is a requests timeout (seconds or ``(connect, read)``)
+    and defaults to the configured connect/read timeouts.
+
+    Returns the final response, which may still carry an error status; callers
+    decide whether to ``raise_for_status()``.
+    """
+    method = method.upper()
+    timeout = timeout if timeout is not None else default_timeout()
+    attempts = attempts or int(os.getenv("HTTP_MAX_ATTEMPTS", HTTP_MAX_ATTEMPTS))
+    if method not in RETRY_METHODS:
+        attempts = 1
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    # Query strings can carry API keys, so only the host and path are logged
+    display_url = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    max_delay = float(os.getenv("HTTP_BACKOFF_MAX_SECONDS", HTTP_BACKOFF_MAX_SECONDS))
+
+    for attempt in range(1, attempts + 1):
+        response, error = None, None
+        start = time.perf_counter()
+        with _host_slot(host):
+            try:
+                response = get_session().request(method, url, timeout=timeout, **kwargs)
+            except TRANSIENT_ERRORS as e:
+                error = e
+        instrumentation.increment("http_calls")
+        instrumentation.observe(f"http.{host}", time.perf_counter() - start)
+
+        if error is None and response.status_code not in RETRY_STATUSES:
+            return response
+        if attempt == attempts:
+            if error is not None:
+                raise error
+            return response
+
+        delay = backoff_delay(attempt)
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                if retry_after > max_delay:
+                    logging.warning(f"{display_url} asked to retry after {retry_after:.0f}s, giving up")
+                    return response
+                # Jitter on top so throttled workers do not retry in lockstep
+                delay = retry_after + random.uniform(0, 1)
+        reason = error if error is not None else f"HTTP {response.status_code}"
+        logging.warning(f"{method} {display_url} failed (attempt {attempt}/{attempts}), retrying in {delay:.1f}s: {reason}")
+        instrumentation.increment("http_retries")
+        # The host slot is released while sleeping so other requests can proceed
+        time.sleep(delay)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
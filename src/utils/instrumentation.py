@@ -0,0 +1,117 @@
+import json
+import time
+import logging
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Latency histogram bucket upper bounds in milliseconds
+HISTOGRAM_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+_current_run = contextvars.ContextVar("instrumentation_run", default=None)
+
+
+class RunMetrics:
+    """Counters and per-stage latencies collected during one trigger invocation."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.counters = {}
+        self.latencies = {}
+        self._lock = threading.Lock()
+
+    def increment(self, counter, value=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self.latencies.setdefault(stage, []).append(seconds * 1000)
+
+    def _summarize(self, samples):
+        samples = sorted(samples)
+        histogram = {}
+        for bound in HISTOGRAM_BUCKETS_MS:
+            label = "inf" if bound == float("inf") else str(bound)
+            histogram[label] = sum(1 for sample in samples if sample <= bound) - sum(histogram.values())
+        return {
+            "count": len(samples),
+            "total_ms": round(sum(samples), 2),
+            "p50_ms": round(samples[len(samples) // 2], 2),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+            "max_ms": round(samples[-1], 2),
+            "histogram": {label: count for label, count in histogram.items() if count},
+        }
+
+    def record(self, status, error=None):
+        """The structured record emitted once per invocation."""
+        with self._lock:
+            record = {
+                "trigger": self.name,
+                "status": status,
+                "duration_ms": round(1000 * (time.perf_counter() - self.started), 2),
+                "counters": dict(self.counters),
+                "stages": {stage: self._summarize(samples) for stage, samples in self.latencies.items()},
+            }
+        if error:
+            record["error"] = error
+        return record
+
+
+def increment(counter, value=1):
+    """Add to a counter of the active invocation; a no-op outside instrumented triggers."""
+    run = _current_run.get()
+    if run is not None:
+        run.increment(counter, value)
+
+
+def observe(stage, seconds):
+    """Record one latency sample for ``stage`` on the active invocation."""
+    run = _current_run.get()
+    if run is not None:
+        run.observe(stage, seconds)
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as one sample of ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+@contextmanager
+def collect(name):
+    """Collect metrics for the enclosed block into a fresh RunMetrics without emitting them."""
+    run = RunMetrics(name)
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+def emit(record):
+    # One JSON line per invocation; Application Insights stores it as a trace
+    logging.info(f"INVOCATION_METRICS {json.dumps(record, default=str)}")
+
+
+def instrumented(name):
+    """Decorator wrapping a trigger so its counters and stage latencies are emitted as one record."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with collect(name) as run:
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    emit(run.record("failed", error=str(e)))
+                    raise
+            emit(run.record("succeeded"))
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,78 @@
+import time
+import logging
+import threading
+from src.utils.state_store import StateStore
+from src.utils.constants import YOUTUBE_METADATA_TTL_HOURS
+
+
+class MetadataCache(StateStore):
+    """Rarely-changing lookups cached in the state collection with a TTL.
+
+    The in-memory copy lives for the worker process, so warm invocations do not
+    touch the database at all; cold starts load the whole namespace in one query.
+    """
+
+    def __init__(self, namespace, ttl_seconds, collection=None):
+        super().__init__(namespace, collection=collection)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def _count(self, hit):
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for ``key`` or call ``loader()`` and cache its result.
+
+        ``None`` results are not cached, so failed lookups are retried next time.
+        """
+        entry = self.get(key)
+        if entry and time.time() - entry.get("cached_at", 0) < self.ttl_seconds:
+            self._count(hit=True)
+            return entry["value"]
+        self._count(hit=False)
+        value = loader()
+        if value is not None:
+            self.set(key, {"value": value, "cached_at": time.time()})
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry in the namespace when ``key`` is None."""
+        if key is not None:
+            self.delete(key)
+            return
+        with self._lock:
+            self._values = {}
+            self._staged = {}
+        try:
+            self.collection.delete_many({"namespace": self.namespace})
+            logging.info(f"Invalidated metadata cache '{self.namespace}'")
+        except Exception as e:
+            logging.error(f"Failed to invalidate metadata cache '{self.namespace}': {e}")
+
+    def stats(self):
+        with self._counter_lock:
+            return {"namespace": self.namespace, "hits": self.hits, "misses": self.misses}
+
+
+# Channel uploads playlists and playlist titles, shared by the YouTube fetchers
+youtube_metadata = MetadataCache("cache:youtube", YOUTUBE_METADATA_TTL_HOURS * 3600)
+
+
+# Usage: python -m src.utils.metadata_cache --invalidate [key]
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    if "--invalidate" in sys.argv:
+        args = sys.argv[sys.argv.index("--invalidate") + 1:]
+        youtube_metadata.invalidate(args[0] if args else None)
+    else:
+        for cached_key, entry in youtube_metadata.items():
+            age_hours = (time.time() - entry.get("cached_at", 0)) / 3600
+            print(f"{cached_key}: {entry.get('value')} (cached {age_hours:.1f}h ago)")
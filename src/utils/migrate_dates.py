@@ -0,0 +1,80 @@
+import sys
+import json
+import logging
+from bson import ObjectId
+from pymongo import UpdateOne
+from src.utils.dates import parse_datetime
+from src.utils.db_connection import get_content_collection, run_with_retry
+from src.utils.constants import MIGRATION_BATCH_SIZE
+
+# Documents written before typed dates existed have no ingested_at
+PENDING_FILTER = {"ingested_at": {"$exists": False}}
+
+
+def typed_dates(document):
+    """The ``$set`` that gives an old document BSON ``published_at`` and ``ingested_at``."""
+    update = {}
+    if document.get("type") != "weather":
+        published_at = parse_datetime(document.get("published_at")) or parse_datetime(document.get("date"))
+        if published_at is not None:
+            update["published_at"] = published_at
+    # A driver-generated ObjectId records the insert time to the second; insertDate
+    # only has day precision, so midnight UTC of that day is the fallback
+    if isinstance(document["_id"], ObjectId):
+        update["ingested_at"] = document["_id"].generation_time
+    else:
+        ingested_at = parse_datetime(document.get("insertDate"))
+        if ingested_at is not None:
+            update["ingested_at"] = ingested_at
+    return update
+
+
+def backfill_dates(collection=None, batch_size=MIGRATION_BATCH_SIZE, dry_run=False, limit=None):
+    """Rewrite documents without typed dates in ``_id`` order, one bulk write per batch.
+
+    Progress is tracked by the ``_id`` of the last document seen, so documents
+    whose dates cannot be parsed are not read again, and the command can be
+    stopped and re-run: migrated documents no longer match the filter.
+    """
+    collection = collection or get_content_collection()
+    report = {"dry_run": dry_run, "scanned": 0, "updated": 0, "unparsed_published": 0, "batches": 0}
+    projection = {"type": 1, "date": 1, "published_at": 1, "insertDate": 1}
+    last_id = None
+    while limit is None or report["scanned"] < limit:
+        filter = dict(PENDING_FILTER)
+        if last_id is not None:
+            filter["_id"] = {"$gt": last_id}
+        size = batch_size if limit is None else min(batch_size, limit - report["scanned"])
+        batch = run_with_retry(lambda: list(collection.find(filter, projection).sort("_id", 1).limit(size)))
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        operations = []
+        for document in batch:
+            update = typed_dates(document)
+            if document.get("type") != "weather" and "published_at" not in update:
+                report["unparsed_published"] += 1
+            if update:
+                operations.append(UpdateOne({"_id": document["_id"]}, {"$set": update}))
+        report["scanned"] += len(batch)
+        report["batches"] += 1
+        if operations and not dry_run:
+            result = run_with_retry(lambda: collection.bulk_write(operations, ordered=False))
+            report["updated"] += result.modified_count
+        elif dry_run:
+            report["updated"] += len(operations)
+        logging.info(f"Date backfill batch {report['batches']}: {report['scanned']} scanned, {report['updated']} updated")
+    return report
+
+
+# Usage: python -m src.utils.migrate_dates [--dry-run] [--batch-size N] [--limit N]
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = sys.argv[1:]
+
+    def option(name, default=None):
+        return int(args[args.index(name) + 1]) if name in args else default
+
+    result = backfill_dates(batch_size=option("--batch-size", MIGRATION_BATCH_SIZE), dry_run="--dry-run" in args,
+                            limit=option("--limit"))
+    print(json.dumps(result, indent=2))
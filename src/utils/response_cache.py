@@ -0,0 +1,61 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from src.utils import instrumentation
+from src.utils.constants import API_CACHE_TTL_SECONDS, API_CACHE_MAX_ENTRIES
+
+
+class ResponseCache:
+    """In-process LRU cache of rendered API responses with a TTL.
+
+    Keys are tuples whose first element is the item type, so an ingest run can
+    drop every cached page of the type it just wrote. Other workers only see new
+    data once their copy expires, which bounds staleness to the TTL.
+    """
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                instrumentation.increment("api_cache_misses")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            instrumentation.increment("api_cache_hits")
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, item_type=None):
+        """Drop cached responses for one item type, or everything."""
+        with self._lock:
+            if item_type is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == item_type]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+dashboard_cache = ResponseCache(int(os.getenv("API_CACHE_MAX_ENTRIES", API_CACHE_MAX_ENTRIES)),
+                                float(os.getenv("API_CACHE_TTL_SECONDS", API_CACHE_TTL_SECONDS)))
@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import logging
+from datetime import datetime, timedelta
+import bson
+from pymongo.errors import OperationFailure
+from src.utils.db_connection import get_content_collection, run_with_retry
+from src.utils.response_cache import dashboard_cache
+from src.utils.constants import RETENTION_BATCH_SIZE, RETENTION_MAX_DOCUMENTS_PER_RUN
+
+# Per-type retention. Items older than ``compact_after_days`` lose their
+# ``heavy_fields`` and are marked archived; items older than ``delete_after_days``
+# are removed. ``None`` disables a step. Ages are measured on ``date_field``.
+RETENTION_POLICIES = {
+    "news": {"date_field": "insertDate", "heavy_fields": ["body", "description"],
+             "compact_after_days": 30, "delete_after_days": 365},
+    "trailer": {"date_field": "insertDate", "heavy_fields": ["description"],
+                "compact_after_days": 30, "delete_after_days": None},
+    "music": {"date_field": "insertDate", "heavy_fields": ["description"],
+              "compact_after_days": 30, "delete_after_days": None},
+    "reddit": {"date_field": "insertDate", "heavy_fields": ["selftext", "score_history"],
+               "compact_after_days": 14, "delete_after_days": 180},
+    "weather": {"date_field": "date", "heavy_fields": [],
+                "compact_after_days": None, "delete_after_days": 90},
+}
+
+# Fields that age a document whose ``date_field`` is missing, tried in order.
+# Documents stored before insertDate was stamped (the first Reddit posts and
+# trailers) only have ``date``, and ``ingested_at`` once src.utils.migrate_dates
+# has run. ``ingested_at`` is a BSON datetime, the others are YYYY-MM-DD strings.
+AGE_FIELDS = ("insertDate", "ingested_at", "date")
+DATETIME_FIELDS = ("ingested_at",)
+
+
+def policy_for(item_type):
+    """The policy for a type with RETENTION_<TYPE>_COMPACT_DAYS / _DELETE_DAYS overrides applied."""
+    policy = dict(RETENTION_POLICIES[item_type])
+    for step in ("compact", "delete"):
+        value = os.getenv(f"RETENTION_{item_type.upper()}_{step.upper()}_DAYS")
+        if value is not None:
+            policy[f"{step}_after_days"] = int(value) if value.strip() else None
+    return policy
+
+
+def _cutoff(days, today):
+    return today - timedelta(days=days)
+
+
+def age_filter(date_field, cutoff):
+    """Match documents older than ``cutoff``, aged on the first of their date fields present."""
+    clauses, missing = [], {}
+    for field in (date_field,) + tuple(field for field in AGE_FIELDS if field != date_field):
+        value = cutoff if field in DATETIME_FIELDS else cutoff.strftime('%Y-%m-%d')
+        clauses.append(dict(missing, **{field: {"$lt": value}}))
+        missing[field] = {"$exists": False}
+    return {"$or": clauses}
+
+
+def _bson_size(document):
+    return len(bson.encode(document)) if document else 0
+
+
+def _iter_batches(collection, filter, batch_size, limit):
+    """Yield lists of matching ids, ``batch_size`` at a time, reading at most ``limit`` documents."""
+    batch = []
+    for document in collection.find(filter, {"_id": 1}).batch_size(batch_size).limit(limit):
+        batch.append(document["_id"])
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _batch_bytes(collection, ids, fields=None):
+    """Summed BSON size of ``fields`` (default: the whole documents) of ``ids``, measured by the server."""
+    measured = {field: f"${field}" for field in fields} if fields else "$$ROOT"
+    pipeline = [{"$match": {"_id": {"$in": ids}}},
+                {"$group": {"_id": None, "bytes": {"$sum": {"$bsonSize": measured}}}}]
+    try:
+        result = run_with_retry(lambda: list(collection.aggregate(pipeline)))
+        return result[0]["bytes"] if result else 0
+    except OperationFailure:
+        # Servers without $bsonSize: read just this batch and measure it here
+        projection = {field: 1 for field in fields} if fields else None
+        documents = run_with_retry(lambda: list(collection.find({"_id": {"$in": ids}}, projection)))
+        if fields:
+            documents = [{k: v for k, v in document.items() if k != "_id"} for document in documents]
+        return sum(_bson_size(document) for document in documents)
+
+
+def compact_type(collection, item_type, policy, today, dry_run=False, batch_size=RETENTION_BATCH_SIZE,
+                 limit=RETENTION_MAX_DOCUMENTS_PER_RUN):
+    """Strip heavy fields from old items of one type; returns documents and bytes affected.
+
+    Items old enough to be expired are left alone, so a dry run does not
+    count them twice.
+    """
+    result = {"documents": 0, "bytes": 0}
+    days = policy["compact_after_days"]
+    if days is None or not policy["heavy_fields"] or limit <= 0:
+        return result
+    date_field = policy["date_field"]
+    conditions = [{"type": item_type, "archived": {"$ne": True}}, age_filter(date_field, _cutoff(days, today))]
+    if policy["delete_after_days"] is not None:
+        conditions.append({"$nor": [age_filter(date_field, _cutoff(policy["delete_after_days"], today))]})
+    update = {
+        "$unset": {field: "" for field in policy["heavy_fields"]},
+        "$set": {"archived": True, "archivedDate": today.strftime('%Y-%m-%d')},
+    }
+    # Only ids are read, and updated in small batches so one run cannot exhaust the RU budget
+    for ids in _iter_batches(collection, {"$and": conditions}, batch_size, limit):
+        result["documents"] += len(ids)
+        result["bytes"] += _batch_bytes(collection, ids, policy["heavy_fields"])
+        if not dry_run:
+            run_with_retry(lambda: collection.update_many({"_id": {"$in": ids}}, update))
+    return result
+
+
+def expire_type(collection, item_type, policy, today, dry_run=False, batch_size=RETENTION_BATCH_SIZE,
+                limit=RETENTION_MAX_DOCUMENTS_PER_RUN):
+    """Delete items of one type past their retention window; returns documents and bytes affected."""
+    result = {"documents": 0, "bytes": 0}
+    days = policy["delete_after_days"]
+    if days is None or limit <= 0:
+        return result
+    filter = {"$and": [{"type": item_type}, age_filter(policy["date_field"], _cutoff(days, today))]}
+    for ids in _iter_batches(collection, filter, batch_size, limit):
+        result["documents"] += len(ids)
+        result["bytes"] += _batch_bytes(collection, ids)
+        if not dry_run:
+            run_with_retry(lambda: collection.delete_many({"_id": {"$in": ids}}))
+    return result
+
+
+def apply_retention(item_types=None, dry_run=False, collection=None, today=None, max_documents=None):
+    """Run expiry and compaction for every type and report what was (or would be) reclaimed.
+
+    At most ``max_documents`` documents are deleted or compacted per run
+    (default from RETENTION_MAX_DOCUMENTS_PER_RUN); the rest is left for the
+    next run. Byte counts are BSON sizes of the removed fields or documents,
+    an estimate of the storage reclaimed before index overhead.
+    """
+    collection = collection or get_content_collection()
+    today = today or datetime.today()
+    if max_documents is None:
+        max_documents = int(os.getenv("RETENTION_MAX_DOCUMENTS_PER_RUN", RETENTION_MAX_DOCUMENTS_PER_RUN))
+    remaining = max_documents
+    report = {"dry_run": dry_run, "types": {}, "documents": 0, "bytes": 0}
+    for item_type in item_types or RETENTION_POLICIES:
+        policy = policy_for(item_type)
+        try:
+            deleted = expire_type(collection, item_type, policy, today, dry_run, limit=remaining)
+            remaining -= deleted["documents"]
+            compacted = compact_type(collection, item_type, policy, today, dry_run, limit=remaining)
+            remaining -= compacted["documents"]
+        except Exception as e:
+            logging.error(f"Retention for {item_type} failed: {e}")
+            report["types"][item_type] = {"error": str(e)}
+            continue
+        report["types"][item_type] = {"deleted": deleted, "compacted": compacted}
+        report["documents"] += deleted["documents"] + compacted["documents"]
+        report["bytes"] += deleted["bytes"] + compacted["bytes"]
+        if not dry_run and (deleted["documents"] or compacted["documents"]):
+            dashboard_cache.invalidate(item_type)
+        logging.info(f"Retention {item_type}{' (dry run)' if dry_run else ''}: deleted {deleted['documents']} "
+                     f"({deleted['bytes']} bytes), compacted {compacted['documents']} ({compacted['bytes']} bytes)")
+    report["capped"] = remaining <= 0
+    if report["capped"]:
+        logging.warning(f"Retention stopped at {max_documents} documents, the rest is left for the next run")
+    return report
+
+
+# Usage: python -m src.utils.retention [--dry-run]
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(apply_retention(dry_run="--dry-run" in sys.argv), indent=2))
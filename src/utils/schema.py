@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import logging
+
+# Indexes on the shared content container. The unique index is partial so documents
+# without a url (weather) are not all treated as duplicates of each other.
+INDEX_SPECS = [
+    {
+        "name": "type_url_unique",
+        "keys": [("type", 1), ("url", 1)],
+        "unique": True,
+        "partialFilterExpression": {"url": {"$type": "string"}},
+    },
+    # Reddit posts are keyed on their id; crossposts of an already stored link
+    # still hit type_url_unique and are counted as duplicates
+    {
+        "name": "type_post_id_unique",
+        "keys": [("type", 1), ("post_id", 1)],
+        "unique": True,
+        "partialFilterExpression": {"post_id": {"$type": "string"}},
+    },
+    {"name": "type_date", "keys": [("type", 1), ("date", -1)]},
+    # Lookup key for the weather upserts, one document per location and day
+    {"name": "type_lat_lon_date", "keys": [("type", 1), ("lat", 1), ("lon", 1), ("date", 1)]},
+    {"name": "insertDate", "keys": [("insertDate", -1)]},
+    # Range queries over the typed publication date
+    {"name": "type_published_at", "keys": [("type", 1), ("published_at", -1)]},
+    # Dashboard API views filter on type and sort by insert date
+    {"name": "type_insertDate", "keys": [("type", 1), ("insertDate", -1)]},
+    # Cosmos DB only sorts on several fields when a compound index has exactly those
+    # fields in that order (or its reverse): the keyset-paginated views sort on
+    # (date field, _id), descending by insertDate and ascending by weather date
+    {"name": "insertDate_id", "keys": [("insertDate", -1), ("_id", -1)]},
+    {"name": "date_id", "keys": [("date", 1), ("_id", 1)]},
+    # The snapshot's Reddit section sorts by insert date, then score; the other
+    # sections reuse insertDate_id or sort on date alone
+    {"name": "insertDate_score", "keys": [("insertDate", -1), ("score", -1)]},
+]
+
+UNIQUE_INDEX_NAME = "type_url_unique"
+
+# Collections already bootstrapped by this worker, keyed by full collection name
+_bootstrapped = {}
+
+
+def _key_pattern(keys):
+    # The server may report directions as floats (1.0) or strings ("text")
+    return tuple((field, int(d) if isinstance(d, (int, float)) else d) for field, d in keys)
+
+
+def _existing_indexes(collection):
+    """Map each existing index key pattern to its name and options."""
+    existing = {}
+    for name, info in collection.index_information().items():
+        existing[_key_pattern(info["key"])] = {"name": name, "unique": info.get("unique", False)}
+    return existing
+
+
+def ensure_indexes(collection, specs=INDEX_SPECS, dry_run=False):
+    """Create any missing indexes and return a report of what was (or would be) done.
+
+    Indexes are matched on their key pattern, so running this repeatedly is a no-op
+    once everything exists, regardless of the names the indexes were created with.
+    """
+    report = {"collection": collection.name, "dry_run": dry_run,
+              "existing": [], "created": [], "missing": [], "failed": {}}
+    try:
+        existing = _existing_indexes(collection)
+    except Exception as e:
+        logging.error(f"Could not read indexes for {collection.name}: {e}")
+        report["failed"]["*"] = str(e)
+        return report
+
+    for spec in specs:
+        options = {k: v for k, v in spec.items() if k != "keys"}
+        match = existing.get(_key_pattern(spec["keys"]))
+        if match and match["unique"] == spec.get("unique", False):
+            report["existing"].append(spec["name"])
+            continue
+        if match:
+            # Same keys but different uniqueness: never drop indexes automatically
+            report["failed"][spec["name"]] = f"conflicts with existing index {match['name']}"
+            continue
+        if dry_run:
+            report["missing"].append(spec["name"])
+            continue
+        try:
+            collection.create_index(spec["keys"], **options)
+            report["created"].append(spec["name"])
+            logging.info(f"Created index {spec['name']} on {collection.name}")
+        except Exception as e:
+            # Usually existing duplicate rows or an unsupported option on Cosmos DB
+            report["failed"][spec["name"]] = str(e)
+            logging.error(f"Failed to create index {spec['name']} on {collection.name}: {e}")
+    return report
+
+
+def bootstrap_collection(collection):
+    """Ensure indexes once per worker process for the given collection."""
+    key = collection.full_name
+    if key in _bootstrapped:
+        return _bootstrapped[key]
+    report = ensure_indexes(collection)
+    if report["failed"]:
+        logging.warning(f"Index bootstrap for {collection.name} incomplete: {report['failed']}")
+    # If the indexes could not even be listed (database unreachable), try again next time
+    if "*" not in report["failed"]:
+        _bootstrapped[key] = report
+    return report
+
+
+def unique_index_ready(collection):
+    """Return True when the unique (type, url) index is known to exist."""
+    report = _bootstrapped.get(collection.full_name)
+    if report is None:
+        # Bootstrap is disabled for this worker; check once without creating anything
+        report = _bootstrapped.setdefault(collection.full_name, ensure_indexes(collection, dry_run=True))
+    return UNIQUE_INDEX_NAME in report["existing"] or UNIQUE_INDEX_NAME in report["created"]
+
+
+def dedup_mode(collection):
+    """Pick how BulkWriter deduplicates: upsert pre-checks or duplicate-key errors.
+
+    INGEST_DEDUP_MODE may be "upsert" (default), "insert" or "auto". "auto" uses
+    plain inserts only when the unique index is in place to reject duplicates.
+    """
+    mode = os.getenv("INGEST_DEDUP_MODE", "upsert").lower()
+    if mode == "auto":
+        return "insert" if unique_index_ready(collection) else "upsert"
+    if mode not in ("upsert", "insert"):
+        logging.warning(f"Unknown INGEST_DEDUP_MODE '{mode}', using upsert")
+        return "upsert"
+    return mode
+
+
+# Usage: python -m src.utils.schema [--dry-run]
+if __name__ == "__main__":
+    from src.utils.db_connection import get_collection
+
+    logging.basicConfig(level=logging.INFO)
+    os.environ["SCHEMA_BOOTSTRAP"] = "false"
+    target = get_collection(os.getenv("COSMOS_DB_CONTAINER_NAME"))
+    result = ensure_indexes(target, dry_run="--dry-run" in sys.argv)
+    print(json.dumps(result, indent=2))
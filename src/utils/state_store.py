@@ -0,0 +1,103 @@
+import os
+import logging
+import threading
+from pymongo import UpdateOne
+from src.utils.db_connection import get_collection, run_with_retry
+
+
+def get_state_collection():
+    """Collection holding small bookkeeping documents (watermarks, caches, feed state)."""
+    return get_collection(os.getenv("COSMOS_DB_STATE_CONTAINER_NAME", "state"))
+
+
+class StateStore:
+    """Key/value documents for one namespace in the state collection.
+
+    All keys of the namespace are loaded with a single query on first access.
+    Writes can be staged and committed together once the data they describe has
+    been stored, so a failed run does not advance its bookkeeping.
+    """
+
+    def __init__(self, namespace, collection=None):
+        self.namespace = namespace
+        self._collection = collection
+        self._values = None
+        self._staged = {}
+        self._lock = threading.Lock()
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = get_state_collection()
+        return self._collection
+
+    def _doc_id(self, key):
+        return f"{self.namespace}:{key}"
+
+    def _load(self):
+        if self._values is None:
+            values = {}
+            try:
+                docs = run_with_retry(lambda: list(self.collection.find({"namespace": self.namespace})))
+                for doc in docs:
+                    values[doc["key"]] = {k: v for k, v in doc.items() if k not in ("_id", "namespace", "key")}
+            except Exception as e:
+                logging.error(f"Failed to load state '{self.namespace}': {e}")
+            self._values = values
+        return self._values
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._load().get(key, default)
+
+    def items(self):
+        with self._lock:
+            return list(self._load().items())
+
+    def stage(self, key, value):
+        """Remember a value to be written by the next commit()."""
+        with self._lock:
+            self._staged[key] = value
+
+    def discard(self):
+        with self._lock:
+            self._staged = {}
+
+    def commit(self, keys=None):
+        """Write staged values in one bulk_write and return how many were saved.
+
+        When ``keys`` is given only those keys are written; the rest are dropped.
+        """
+        with self._lock:
+            staged, self._staged = self._staged, {}
+        if keys is not None:
+            staged = {key: value for key, value in staged.items() if key in keys}
+        if not staged:
+            return 0
+        operations = [
+            UpdateOne({"_id": self._doc_id(key)},
+                      {"$set": {"namespace": self.namespace, "key": key, **value}},
+                      upsert=True)
+            for key, value in staged.items()
+        ]
+        try:
+            run_with_retry(lambda: self.collection.bulk_write(operations, ordered=False))
+        except Exception as e:
+            logging.error(f"Failed to save state '{self.namespace}': {e}")
+            return 0
+        with self._lock:
+            self._load().update(staged)
+        return len(staged)
+
+    def set(self, key, value):
+        self.stage(key, value)
+        return self.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._load().pop(key, None)
+            self._staged.pop(key, None)
+        try:
+            self.collection.delete_one({"_id": self._doc_id(key)})
+        except Exception as e:
+            logging.error(f"Failed to delete state {self._doc_id(key)}: {e}")
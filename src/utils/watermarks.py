@@ -0,0 +1,74 @@
+import logging
+from datetime import datetime, timezone, timedelta
+from src.utils.state_store import StateStore
+from src.utils.dates import parse_datetime
+from src.utils.constants import YOUTUBE_MAX_CATCHUP_DAYS
+
+
+def parse_published_at(value):
+    """Parse a YouTube ``publishedAt`` timestamp into an aware UTC datetime."""
+    return parse_datetime(value)
+
+
+class WatermarkStore(StateStore):
+    """Newest ``publishedAt`` and video ID seen per YouTube channel or playlist."""
+
+    def __init__(self, collection=None):
+        super().__init__("watermark:youtube", collection=collection)
+
+    def since(self, source_id):
+        """Return ``(since, video_id)`` marking where the next fetch can stop.
+
+        Without a watermark this falls back to the start of yesterday (UTC), which
+        matches the old today-or-yesterday window. Catch-up after missed runs is
+        capped at YOUTUBE_MAX_CATCHUP_DAYS.
+        """
+        since, video_id, capped = self._since(source_id)
+        if capped:
+            logging.info(f"Watermark for {source_id} is older than {YOUTUBE_MAX_CATCHUP_DAYS} days, catching up from {since.date()}")
+        return since, video_id
+
+    def _since(self, source_id):
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        oldest = today - timedelta(days=YOUTUBE_MAX_CATCHUP_DAYS)
+        watermark = self.get(source_id)
+        if not watermark:
+            return today - timedelta(days=1), None, False
+        since = parse_published_at(watermark["published_at"])
+        if since < oldest:
+            return oldest, watermark.get("video_id"), True
+        return since, watermark.get("video_id"), False
+
+    def days_behind(self, source_id):
+        """Whole days between the point the next fetch reads back to and now, at least 1."""
+        since = self._since(source_id)[0]
+        return max(1, int(-(-(datetime.now(timezone.utc) - since).total_seconds() // 86400)))
+
+    def advance(self, source_id, published_at, video_id):
+        """Stage a newer watermark; it is only saved by commit()."""
+        current = self._staged.get(source_id) or self.get(source_id)
+        if current and parse_published_at(current["published_at"]) >= published_at:
+            return
+        self.stage(source_id, {
+            "published_at": published_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "video_id": video_id,
+            "updated_at": datetime.now(timezone.utc),
+        })
+
+
+def newest_before_pending(seen, pending_ids):
+    """The newest ``(published_at, video_id)`` in ``seen`` older than every pending video, or None.
+
+    A watermark moved past an upcoming premiere or a live stream would never
+    read it again once it has a duration.
+    """
+    pending = [published_at for published_at, video_id in seen if video_id in pending_ids]
+    if pending:
+        seen = [entry for entry in seen if entry[0] < min(pending)]
+    return max(seen, key=lambda entry: entry[0], default=None)
+
+
+def is_sorted_newest_first(items):
+    """True when playlist items are in descending ``publishedAt`` order."""
+    dates = [item['snippet']['publishedAt'] for item in items]
+    return all(a >= b for a, b in zip(dates, dates[1:]))
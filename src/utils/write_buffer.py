@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import time
+import glob
+import sqlite3
+import logging
+import tempfile
+import threading
+import bson
+from src.utils import instrumentation
+from src.utils.bulk_ingest import write_specs
+from src.utils.db_connection import get_collection, ping
+from src.utils.response_cache import dashboard_cache
+from src.utils.constants import WRITE_BUFFER_FLUSH_SIZE, WRITE_BUFFER_MAX_ATTEMPTS, WRITE_BUFFER_ORPHAN_HOURS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    collection TEXT NOT NULL,
+    item_type TEXT,
+    operations BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_error TEXT
+)
+"""
+
+
+def base_path():
+    if os.getenv("WRITE_BUFFER_PATH"):
+        return os.getenv("WRITE_BUFFER_PATH")
+    if os.getenv("WEBSITE_INSTANCE_ID") and os.getenv("HOME"):
+        # On Azure $HOME is the app's persistent file share, unlike the worker's temp directory
+        return os.path.join(os.environ["HOME"], "data", "dashboard-write-buffer.sqlite")
+    return os.path.join(tempfile.gettempdir(), "dashboard-write-buffer.sqlite")
+
+
+def default_path():
+    # Scaled-out instances share the $HOME file share, and SQLite locking over SMB
+    # cannot be relied on, so every instance keeps its own file
+    instance = os.getenv("WEBSITE_INSTANCE_ID")
+    if not instance:
+        return base_path()
+    root, ext = os.path.splitext(base_path())
+    return f"{root}.{instance}{ext}"
+
+
+class WriteBuffer:
+    """Durable local queue of bulk writes the database could not take.
+
+    BulkWriter appends a batch here when the database keeps throttling or is
+    unreachable, instead of dropping it. Each batch is one SQLite row holding
+    the BSON-encoded operation specs, so documents keep their datetimes and
+    ObjectIds. ``replay`` runs at the start of the next invocation and writes
+    the buffered rows back in large batches with backoff on throttling; rows
+    are deleted once written. Every BulkWriter write is an upsert or an insert
+    guarded by the unique index, so replaying a row twice is harmless.
+
+    On Azure each instance has its own file. Replay stamps it, and adopts the
+    files of instances that have not replayed for ``WRITE_BUFFER_ORPHAN_HOURS``
+    (scaled in or recycled) by renaming them, so only one instance ever
+    replays a given row.
+    """
+
+    def __init__(self, path=None):
+        self._path = path
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._initialized = set()
+
+    @property
+    def path(self):
+        return self._path or default_path()
+
+    @property
+    def durable(self):
+        """False when the buffer lives in the temp directory, which a restart or scale-in may wipe."""
+        return bool(self._path or os.getenv("WRITE_BUFFER_PATH")
+                    or (os.getenv("WEBSITE_INSTANCE_ID") and os.getenv("HOME")))
+
+    def _connect(self, path=None):
+        path = path or self.path
+        if path not in self._initialized:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        connection = sqlite3.connect(path, timeout=30)
+        if path not in self._initialized:
+            connection.execute(SCHEMA)
+            connection.commit()
+            self._initialized.add(path)
+        return connection
+
+    def append(self, collection_name, specs, item_type=None, error=None):
+        """Persist one batch of operation specs; returns the number of operations buffered."""
+        payload = bson.encode({"operations": list(specs)})
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute(
+                    "INSERT INTO batches (collection, item_type, operations, size, created_at, last_error) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (collection_name, item_type, payload, len(specs), time.time(), str(error) if error else None))
+                connection.commit()
+            finally:
+                connection.close()
+        instrumentation.increment("writes_buffered", len(specs))
+        logging.warning(f"Buffered {len(specs)} writes to {collection_name} locally: {error}")
+        return len(specs)
+
+    def _own_paths(self):
+        """This instance's buffer file and the files it adopted, those that exist."""
+        paths = [self.path]
+        if self._path is None and os.getenv("WEBSITE_INSTANCE_ID"):
+            root, ext = os.path.splitext(self.path)
+            paths += sorted(glob.glob(f"{glob.escape(root)}.adopted-*{ext}"))
+        return [path for path in paths if os.path.exists(path)]
+
+    def _adopt_orphans(self, orphan_hours):
+        """Rename the buffer files of instances that stopped replaying into this instance's name."""
+        if self._path is not None or not os.getenv("WEBSITE_INSTANCE_ID"):
+            return []
+        root, ext = os.path.splitext(base_path())
+        own_root = os.path.splitext(self.path)[0]
+        adopted = []
+        for candidate in sorted(glob.glob(f"{glob.escape(root)}.*{ext}")):
+            if candidate == self.path or candidate.startswith(own_root + "."):
+                continue
+            try:
+                if time.time() - os.path.getmtime(candidate) < orphan_hours * 3600:
+                    continue
+                target = f"{own_root}.adopted-{time.time_ns()}{ext}"
+                # Renaming is atomic on the share: when two instances race, only one gets the file
+                os.rename(candidate, target)
+            except OSError:
+                continue
+            logging.warning(f"Adopted write buffer {candidate} of an instance that stopped replaying")
+            adopted.append(target)
+        return adopted
+
+    def pending(self):
+        """Number of buffered batches and operations."""
+        batches, operations = 0, 0
+        for path in self._own_paths():
+            with self._lock:
+                connection = self._connect(path)
+                try:
+                    count, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM batches").fetchone()
+                finally:
+                    connection.close()
+            batches += count
+            operations += size
+        return {"batches": batches, "operations": operations}
+
+    def _rows(self, path):
+        with self._lock:
+            connection = self._connect(path)
+            try:
+                return connection.execute(
+                    "SELECT id, collection, item_type, operations FROM batches ORDER BY id").fetchall()
+            finally:
+                connection.close()
+
+    def _finish(self, path, row_ids, error=None):
+        """Delete written rows, or count a failed attempt on them."""
+        with self._lock:
+            connection = self._connect(path)
+            try:
+                placeholders = ",".join("?" * len(row_ids))
+                if error is None:
+                    connection.execute(f"DELETE FROM batches WHERE id IN ({placeholders})", row_ids)
+                else:
+                    connection.execute(f"UPDATE batches SET attempts = attempts + 1, last_error = ? "
+                                       f"WHERE id IN ({placeholders})", [str(error), *row_ids])
+                connection.commit()
+            finally:
+                connection.close()
+
+    def _write(self, collection, specs, max_attempts):
+        """Bulk write ``specs``, re-sending only throttled operations; returns (written, failed)."""
+        outcome = write_specs(collection, specs, attempts=max_attempts)
+        if outcome["throttled"]:
+            raise RuntimeError(f"{len(outcome['throttled'])} writes still throttled after {max_attempts} attempts")
+        return outcome["inserted"] + outcome["updated"], len(outcome["errors"])
+
+    def replay(self, flush_size=None, max_attempts=None, orphan_hours=None):
+        """Write every buffered batch back to the database, oldest first.
+
+        Rows for the same collection are merged into bulk calls of up to
+        ``flush_size`` operations. Replay stops at the first group that cannot
+        be written, leaving it and everything after it for the next invocation.
+        Nothing is attempted while the database does not answer a ping. Only
+        one thread per process replays at a time; others return at once.
+        """
+        report = {"batches": 0, "written": 0, "failed": 0, "remaining": 0}
+        if not self._replay_lock.acquire(blocking=False):
+            return report
+        flush_size = flush_size or int(os.getenv("WRITE_BUFFER_FLUSH_SIZE", WRITE_BUFFER_FLUSH_SIZE))
+        max_attempts = max_attempts or int(os.getenv("WRITE_BUFFER_MAX_ATTEMPTS", WRITE_BUFFER_MAX_ATTEMPTS))
+        orphan_hours = orphan_hours or float(os.getenv("WRITE_BUFFER_ORPHAN_HOURS", WRITE_BUFFER_ORPHAN_HOURS))
+        try:
+            for path in self._own_paths():
+                # Tells other instances these files still have an owner
+                os.utime(path)
+            self._adopt_orphans(orphan_hours)
+            files = [(path, self._rows(path)) for path in self._own_paths()]
+            for path, rows in files:
+                if not rows and path != self.path:
+                    os.remove(path)
+            files = [(path, rows) for path, rows in files if rows]
+            if not files:
+                return report
+            # Pinged only when there is something to replay, so an empty buffer costs no round trip
+            health = ping()
+            if not health["ok"]:
+                report["remaining"] = sum(len(rows) for _, rows in files)
+                logging.warning(f"Database unreachable, keeping {report['remaining']} buffered write batches: "
+                                f"{health.get('error')}")
+                return report
+            for index, (path, rows) in enumerate(files):
+                if not self._replay_file(path, rows, flush_size, max_attempts, report):
+                    report["remaining"] += sum(len(later_rows) for _, later_rows in files[index + 1:])
+                    break
+            instrumentation.increment("writes_replayed", report["written"])
+            logging.info(f"Buffered write replay: {report}")
+            return report
+        finally:
+            self._replay_lock.release()
+
+    def _replay_file(self, path, rows, flush_size, max_attempts, report):
+        """Replay the rows of one buffer file into ``report``; False when it stopped at a failure."""
+        logging.info(f"Replaying {len(rows)} buffered write batches from {path}")
+        groups, current = [], None
+        for row_id, collection_name, item_type, payload in rows:
+            specs = bson.decode(payload)["operations"]
+            if current is None or current["collection"] != collection_name or len(current["specs"]) + len(specs) > flush_size:
+                current = {"collection": collection_name, "ids": [], "specs": [], "item_types": set()}
+                groups.append(current)
+            current["ids"].append(row_id)
+            current["specs"].extend(specs)
+            current["item_types"].add(item_type)
+
+        for index, group in enumerate(groups):
+            try:
+                written, failed = self._write(get_collection(group["collection"]), group["specs"], max_attempts)
+            except Exception as e:
+                logging.error(f"Replay of buffered writes to {group['collection']} failed, keeping "
+                              f"{sum(len(g['ids']) for g in groups[index:])} batches for the next run: {e}")
+                self._finish(path, group["ids"], error=e)
+                report["remaining"] += sum(len(g["ids"]) for g in groups[index:])
+                return False
+            if failed:
+                logging.error(f"{failed} buffered writes to {group['collection']} were rejected and dropped")
+            self._finish(path, group["ids"])
+            report["batches"] += len(group["ids"])
+            report["written"] += written
+            report["failed"] += failed
+            for item_type in group["item_types"]:
+                if written and item_type:
+                    dashboard_cache.invalidate(item_type)
+        if path != self.path:
+            os.remove(path)
+        return True
+
+
+write_buffer = WriteBuffer()
+
+
+def unsaved_writes(counts, buffer=write_buffer):
+    """Writes of a run that may never reach the database: failed ones, and buffered
+    ones unless the buffer survives restarts. Sources keep their bookkeeping
+    (watermarks, validators, fingerprints) while this is non-zero, so the items
+    are fetched and written again next run."""
+    return counts["failed"] + (0 if buffer.durable else counts["buffered"])
+
+
+# Usage: python -m src.utils.write_buffer [--replay]
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if "--replay" in sys.argv:
+        print(json.dumps(write_buffer.replay(), indent=2))
+    print(json.dumps({"path": write_buffer.path, **write_buffer.pending()}, indent=2))
@@ -0,0 +1,151 @@
+import os
+import re
+import json
+import queue
+import logging
+import threading
+import httplib2
+from contextlib import contextmanager
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.http import HttpRequest
+from src.utils import instrumentation
+from src.utils.youtube_quota import youtube_quota
+from src.utils.constants import YOUTUBE_HTTP_TIMEOUT_SECONDS, YOUTUBE_SHORTS_MAX_SECONDS
+
+# videos().list accepts at most 50 IDs per call, for 1 quota unit
+VIDEO_DETAILS_BATCH_SIZE = 50
+_DURATION = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+_client = None
+_client_lock = threading.Lock()
+# Idle keep-alive transports shared by every thread of the process
+_transports = queue.LifoQueue()
+
+
+@contextmanager
+def _transport():
+    """Check out a keep-alive HTTP transport from the process-wide pool.
+
+    httplib2.Http is not thread-safe, so a transport serves one request at a
+    time. The fetch threads only live for one run, so transports are kept here
+    instead of on the threads and reused by later calls and invocations; the
+    most recently returned one goes out first, its connection is the likeliest
+    to still be open. The pool grows to the number of concurrent requests.
+    """
+    try:
+        http = _transports.get_nowait()
+    except queue.Empty:
+        http = httplib2.Http(timeout=YOUTUBE_HTTP_TIMEOUT_SECONDS)
+    try:
+        yield http
+    finally:
+        _transports.put(http)
+
+
+class InstrumentedHttpRequest(HttpRequest):
+    """HttpRequest that counts, times and charges quota for each API call.
+
+    Calls the remaining daily quota cannot cover raise QuotaExhausted before
+    anything is sent.
+    """
+
+    def execute(self, http=None, num_retries=0):
+        youtube_quota.check(self.methodId)
+        instrumentation.increment("http_calls")
+        instrumentation.increment("youtube_calls")
+        try:
+            with instrumentation.stage(f"youtube.{self.methodId}"):
+                if http is not None:
+                    return super().execute(http=http, num_retries=num_retries)
+                with _transport() as pooled:
+                    return super().execute(http=pooled, num_retries=num_retries)
+        finally:
+            # Failed requests are charged by the API too
+            youtube_quota.charge(self.methodId)
+
+
+def _build_request(http, *args, **kwargs):
+    # Requests run on a transport checked out of the pool when executed, not on
+    # the one the shared service object was built with
+    return InstrumentedHttpRequest(http, *args, **kwargs)
+
+
+def _build_client():
+    api_key = os.getenv('YOUTUBE_API_KEY')
+    document_path = os.getenv('YOUTUBE_DISCOVERY_DOCUMENT')
+    if document_path:
+        with open(document_path) as f:
+            document = json.load(f)
+        logging.info(f"Building YouTube client from discovery document {document_path}")
+        return build_from_document(document, developerKey=api_key,
+                                   http=httplib2.Http(timeout=YOUTUBE_HTTP_TIMEOUT_SECONDS),
+                                   requestBuilder=_build_request)
+    # static_discovery uses the discovery document bundled with google-api-python-client,
+    # so building the client never makes a network request
+    return build('youtube', 'v3', developerKey=api_key, static_discovery=True, cache_discovery=False,
+                 http=httplib2.Http(timeout=YOUTUBE_HTTP_TIMEOUT_SECONDS), requestBuilder=_build_request)
+
+
+def get_youtube_client():
+    """Return the process-wide YouTube Data API client, building it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_client()
+    return _client
+
+
+def parse_duration(value):
+    """Seconds in an ISO 8601 duration such as ``PT1M30S``, or None."""
+    match = _DURATION.match(value or "")
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(group or 0) for group in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def fetch_video_details(youtube, video_ids, part="snippet,contentDetails,statistics"):
+    """Look up videos 50 IDs per ``videos().list`` call; returns a dict of video ID to resource."""
+    details = {}
+    video_ids = list(dict.fromkeys(video_ids))
+    for start in range(0, len(video_ids), VIDEO_DETAILS_BATCH_SIZE):
+        batch = video_ids[start:start + VIDEO_DETAILS_BATCH_SIZE]
+        response = youtube.videos().list(part=part, id=",".join(batch), maxResults=len(batch)).execute()
+        for item in response.get("items", []):
+            details[item["id"]] = item
+    return details
+
+
+def add_video_details(youtube, videos, pending=None):
+    """Attach duration and view count to each video dict and drop Shorts.
+
+    Videos need a ``video_id``; ones the API no longer returns (deleted or
+    made private since they were listed) are dropped too. Upcoming premieres
+    and live streams have no duration yet (``P0D``): they are left out and
+    appended to ``pending``, so the caller can keep its watermark before them.
+    """
+    if not videos:
+        return videos
+    shorts_max = int(os.getenv("YOUTUBE_SHORTS_MAX_SECONDS", YOUTUBE_SHORTS_MAX_SECONDS))
+    details = fetch_video_details(youtube, [video["video_id"] for video in videos])
+    kept = []
+    for video in videos:
+        item = details.get(video["video_id"])
+        if item is None:
+            logging.info(f"Skipping unavailable video: {video['title']}")
+            continue
+        if item.get("snippet", {}).get("liveBroadcastContent") in ("upcoming", "live"):
+            logging.info(f"Leaving {item['snippet']['liveBroadcastContent']} video for a later run: {video['title']}")
+            if pending is not None:
+                pending.append(video)
+            continue
+        duration = parse_duration(item.get("contentDetails", {}).get("duration"))
+        if duration and duration <= shorts_max:
+            logging.info(f"Skipping Short ({duration}s): {video['title']}")
+            continue
+        video["duration_seconds"] = duration
+        view_count = item.get("statistics", {}).get("viewCount")
+        video["view_count"] = int(view_count) if view_count is not None else None
+        kept.append(video)
+    return kept
@@ -0,0 +1,147 @@
+import os
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from src.utils import instrumentation
+from src.utils.state_store import get_state_collection
+from src.utils.constants import (YOUTUBE_DAILY_QUOTA, YOUTUBE_QUOTA_RESERVE, YOUTUBE_SOURCE_PRIORITIES,
+                                 YOUTUBE_DEFAULT_PRIORITY, YOUTUBE_ITEMS_PER_DAY_ESTIMATE)
+
+# Quota units per YouTube Data API method; list calls cost 1 unit whatever the page size
+QUOTA_COSTS = {
+    "youtube.search.list": 100,
+}
+DEFAULT_COST = 1
+
+try:
+    from zoneinfo import ZoneInfo
+    # The daily quota resets at midnight Pacific time
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+except Exception:
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+
+class QuotaExhausted(Exception):
+    """Raised before a call that the remaining daily budget cannot cover."""
+
+
+def estimate_source_cost(days=1, items_per_day=YOUTUBE_ITEMS_PER_DAY_ESTIMATE):
+    """Units to read ``days`` of uploads of one channel or playlist: metadata, item pages and video details.
+
+    Sources are paged until their watermark, so this is an estimate for
+    planning; a source that turns out busier spends more, and stops with
+    QuotaExhausted (staging nothing) if the budget runs out.
+    """
+    pages = max(1, -(-int(days * items_per_day) // 50))
+    return 1 + pages + pages
+
+
+class QuotaScheduler:
+    """Tracks YouTube quota units spent today and decides which sources a run can afford.
+
+    Every executed request is charged through ``charge``. Spent units are kept
+    per Pacific day in the state collection with ``$inc``, so several workers
+    share one daily total. Sources are admitted in priority order (lower number
+    first) while the estimated cost fits in what is left of the daily budget
+    after ``reserve``; the rest are skipped for this run and catch up on a later
+    one from their watermarks.
+    """
+
+    def __init__(self, daily_budget, reserve=0, collection=None):
+        self.daily_budget = daily_budget
+        self.reserve = reserve
+        self._collection = collection
+        self._lock = threading.Lock()
+        # Today's total as last read (plus what this worker flushed since), and units not yet saved
+        self._stored = 0
+        self._unflushed = 0
+        self.spent_by_worker = 0
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = get_state_collection()
+        return self._collection
+
+    def _doc_id(self):
+        return f"quota:youtube:{datetime.now(QUOTA_TIMEZONE).strftime('%Y-%m-%d')}"
+
+    def refresh(self):
+        """Reload today's total spent by every worker."""
+        try:
+            document = self.collection.find_one({"_id": self._doc_id()})
+        except Exception as e:
+            logging.warning(f"Could not read YouTube quota usage, assuming none: {e}")
+            document = None
+        with self._lock:
+            self._stored = (document or {}).get("units", 0)
+
+    def remaining(self):
+        with self._lock:
+            return self.daily_budget - self.reserve - self._stored - self._unflushed
+
+    def plan(self, source_ids, priorities=None, cost_per_source=None):
+        """Split sources into those this run can afford and those it skips.
+
+        ``cost_per_source`` is a number of units or a function of the source ID.
+        """
+        self.refresh()
+        priorities = priorities if priorities is not None else YOUTUBE_SOURCE_PRIORITIES
+        cost_per_source = cost_per_source or estimate_source_cost()
+        cost_of = cost_per_source if callable(cost_per_source) else (lambda source_id: cost_per_source)
+        ordered = sorted(source_ids, key=lambda source_id: priorities.get(source_id, YOUTUBE_DEFAULT_PRIORITY))
+        budget = self.remaining()
+        selected, skipped = [], []
+        for source_id in ordered:
+            cost = cost_of(source_id)
+            if budget >= cost:
+                selected.append(source_id)
+                budget -= cost
+            else:
+                skipped.append(source_id)
+        if skipped:
+            logging.warning(f"YouTube quota low ({self.remaining()} units left today): skipping {skipped}")
+        # Keep the caller's order among the admitted sources
+        admitted = set(selected)
+        return [source_id for source_id in source_ids if source_id in admitted], skipped
+
+    def check(self, method_id):
+        """Raise QuotaExhausted when ``method_id`` would exceed the daily budget."""
+        cost = QUOTA_COSTS.get(method_id, DEFAULT_COST)
+        if self.remaining() < cost:
+            instrumentation.increment("youtube_quota_denied")
+            raise QuotaExhausted(f"{method_id} needs {cost} units, {self.remaining()} left today")
+
+    def charge(self, method_id):
+        """Record the units spent on one executed request."""
+        cost = QUOTA_COSTS.get(method_id, DEFAULT_COST)
+        with self._lock:
+            self._unflushed += cost
+            self.spent_by_worker += cost
+        instrumentation.increment("youtube_quota_units", cost)
+
+    def flush(self):
+        """Add the units spent since the last flush to today's shared total."""
+        with self._lock:
+            units, self._unflushed = self._unflushed, 0
+        if not units:
+            return
+        try:
+            self.collection.update_one({"_id": self._doc_id()},
+                                       {"$inc": {"units": units}, "$set": {"namespace": "quota:youtube"}},
+                                       upsert=True)
+            with self._lock:
+                self._stored += units
+        except Exception as e:
+            with self._lock:
+                self._unflushed += units
+            logging.error(f"Failed to save YouTube quota usage: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {"spent_by_worker": self.spent_by_worker, "spent_today": self._stored + self._unflushed,
+                    "daily_budget": self.daily_budget, "reserve": self.reserve}
+
+
+youtube_quota = QuotaScheduler(int(os.getenv("YOUTUBE_DAILY_QUOTA", YOUTUBE_DAILY_QUOTA)),
+                               int(os.getenv("YOUTUBE_QUOTA_RESERVE", YOUTUBE_QUOTA_RESERVE)))
@@ -0,0 +1,63 @@
+import os
+import logging
+from functools import partial
+from src.pipeline import Source
+from src.utils import instrumentation
+from src.utils.concurrency import iter_ordered
+from src.utils.metadata_cache import youtube_metadata
+from src.utils.youtube_quota import youtube_quota, estimate_source_cost
+from src.utils.watermarks import WatermarkStore
+from src.utils.write_buffer import unsaved_writes
+from src.utils.constants import YOUTUBE_MAX_WORKERS, YOUTUBE_SOURCE_TIMEOUT_SECONDS
+
+
+class YouTubeSource(Source):
+    """Channels or playlists fetched concurrently, yielding videos in source order.
+
+    ``fetch_videos(source_id, watermarks=...)`` returns the new videos of one
+    channel or playlist. Watermarks are only committed for sources that were
+    fetched, and only when every video was stored. When the day's quota cannot
+    cover every source, the lowest-priority ones are left for a later run.
+    View counts are left out of the fingerprint, they change on every run.
+    """
+
+    fingerprinted = True
+    fingerprint_fields = ("title", "description", "thumbnail", "date", "published_at", "duration_seconds")
+
+    def __init__(self, source_ids, fetch_videos, item_type, label):
+        self.source_ids = list(source_ids)
+        self.fetch_videos = fetch_videos
+        self.item_type = item_type
+        self.name = item_type
+        self.label = label
+        self.max_workers = int(os.getenv('YOUTUBE_MAX_WORKERS', YOUTUBE_MAX_WORKERS))
+        self.timeout = float(os.getenv('YOUTUBE_SOURCE_TIMEOUT_SECONDS', YOUTUBE_SOURCE_TIMEOUT_SECONDS))
+        self.watermarks = WatermarkStore()
+        self.fetched = set()
+
+    def iter_items(self):
+        # Sources behind by several days page back further, so they are planned as costing more
+        source_ids, skipped = youtube_quota.plan(
+            self.source_ids, cost_per_source=lambda source_id: estimate_source_cost(self.watermarks.days_behind(source_id)))
+        if skipped:
+            instrumentation.increment("youtube_sources_skipped", len(skipped))
+        logging.info(f"Fetching videos from {len(source_ids)} {self.label}s with {self.max_workers} workers")
+        results = iter_ordered(partial(self.fetch_videos, watermarks=self.watermarks), source_ids,
+                               max_workers=self.max_workers, timeout=self.timeout, label=self.label)
+        for source_id, videos, error in results:
+            if error:
+                continue
+            self.fetched.add(source_id)
+            logging.info(f"Found {len(videos)} videos in {self.label} {source_id}")
+            yield from videos
+        logging.info(f"YouTube metadata cache: {youtube_metadata.stats()}")
+
+    def on_stored(self, counts):
+        youtube_quota.flush()
+        logging.info(f"YouTube quota: {youtube_quota.stats()}")
+        if unsaved_writes(counts):
+            # Keep the old watermarks so the failed videos are fetched again next run
+            logging.warning(f"Not advancing {self.label} watermarks because some videos were not stored.")
+            self.watermarks.discard()
+            return
+        self.watermarks.commit(keys=self.fetched)
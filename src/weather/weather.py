@@ -1,41 +1,150 @@
 import os
-import requests
 import logging
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timezone
+from src.pipeline import Source, run_pipeline
+from src.utils import instrumentation, http_client
+from src.utils.concurrency import iter_ordered
 from src.utils.constants import *
-from src.utils.db_connection import get_collection
 
-def fetch_and_store_weather_data(LAT, LON):
+
+def parse_locations(value):
+    """Parse ``"lat,lon;lat,lon"`` into a list of (lat, lon) tuples."""
+    locations = []
+    for pair in value.split(";"):
+        if pair.strip():
+            lat, lon = pair.split(",")
+            locations.append((float(lat), float(lon)))
+    return locations
+
+
+def configured_locations():
+    value = os.getenv("WEATHER_LOCATIONS")
+    return parse_locations(value) if value else list(WEATHER_LOCATIONS)
+
+
+def _local_date(timestamp, offset_seconds):
+    # OpenWeatherMap reports UTC timestamps plus the location's offset from UTC
+    return datetime.fromtimestamp(timestamp + offset_seconds, timezone.utc).strftime("%Y-%m-%d")
+
+
+def aggregate_forecast(forecast, lat, lon, current=None):
+    """Fold the 3-hour forecast slots into one document per local day.
+
+    Each day gets the highest and lowest temperature of its slots and its most
+    frequent condition. ``current`` conditions, when given, are folded into
+    today and their description is used as today's status.
+    """
+    offset = forecast.get("city", {}).get("timezone", 0)
+    days = {}
+    for slot in forecast.get("list", []):
+        date = _local_date(slot["dt"], offset)
+        day = days.setdefault(date, {"high_temp": slot["main"]["temp_max"], "low_temp": slot["main"]["temp_min"],
+                                     "statuses": Counter()})
+        day["high_temp"] = max(day["high_temp"], slot["main"]["temp_max"])
+        day["low_temp"] = min(day["low_temp"], slot["main"]["temp_min"])
+        day["statuses"][slot["weather"][0]["description"]] += 1
+
+    today = None
+    if current is not None:
+        today = _local_date(current["dt"], current.get("timezone", offset))
+        day = days.setdefault(today, {"high_temp": current["main"]["temp_max"],
+                                      "low_temp": current["main"]["temp_min"], "statuses": Counter()})
+        day["high_temp"] = max(day["high_temp"], current["main"]["temp_max"])
+        day["low_temp"] = min(day["low_temp"], current["main"]["temp_min"])
+
+    documents = []
+    for date in sorted(days):
+        day = days[date]
+        if date == today:
+            status = current["weather"][0]["description"]
+        else:
+            status = day["statuses"].most_common(1)[0][0]
+        documents.append({
+            "date": date,
+            "status": status,
+            "high_temp": day["high_temp"],
+            "low_temp": day["low_temp"],
+            "lat": lat,
+            "lon": lon
+        })
+    return documents
+
+
+def fetch_location_weather(location):
+    """Fetch current conditions and the 5 day forecast for one location as daily documents."""
+    lat, lon = location
+    # OpenWeatherMap API key
+    API_KEY = os.getenv("WEATHER_API_KEY")
+    params = {"lat": lat, "lon": lon, "appid": API_KEY, "units": "imperial"}
+
+    #grabbing current day to include in the weather data, the forecast only covers the rest of today so needs to be separate
+    with instrumentation.stage("weather.current"):
+        current_resp = http_client.get(WEATHER_CURRENT_URL, params=params)
+    current_resp.raise_for_status()
+
+    with instrumentation.stage("weather.forecast"):
+        forecast_resp = http_client.get(WEATHER_BASE_URL, params=params)
+    forecast_resp.raise_for_status()
+
+    return aggregate_forecast(forecast_resp.json(), lat, lon, current=current_resp.json())
+
+
+class WeatherForecastSource(Source):
+    """Daily weather for each location: today's conditions plus the 5 day forecast.
+
+    Locations are fetched concurrently. Documents are keyed by location and day
+    and written with ``$set``, so each run refreshes the forecast for days that
+    are already stored instead of adding another copy. Locations that could
+    not be fetched are collected in ``errors``.
+    """
+
+    name = "weather"
+    item_type = "weather"
+    key_fields = ("type", "lat", "lon", "date")
+    write_mode = "set"
+    # A forecast day is not a publication date
+    published_from = ()
+
+    def __init__(self, locations):
+        self.locations = list(locations)
+        self.max_workers = int(os.getenv("WEATHER_MAX_WORKERS", WEATHER_MAX_WORKERS))
+        self.errors = {}
+
+    def iter_items(self):
+        results = iter_ordered(fetch_location_weather, self.locations, max_workers=self.max_workers,
+                               label="weather location", errors=self.errors)
+        for location, days, error in results:
+            if error:
+                continue
+            logging.info(f"Weather for {location}: {len(days)} days")
+            yield from days
+
+
+def fetch_and_store_weather_data(LAT=None, LON=None):
+    """Store the forecast for one location, or for every configured location when none is given.
+
+    The returned stats include ``failed_locations`` and the error of each one.
+    """
+    try:
+        locations = [(LAT, LON)] if LAT is not None and LON is not None else configured_locations()
+    except ValueError as e:
+        logging.error(f"Invalid WEATHER_LOCATIONS '{os.getenv('WEATHER_LOCATIONS')}', expected lat,lon;lat,lon: {e}")
+        return None
     try:
-        # OpenWeatherMap API key and base URL
-        API_KEY = os.getenv("WEATHER_API_KEY")
-
-        collection = get_collection(os.getenv("COSMOS_DB_CONTAINER_NAME"))
-        #grabbing current day to include in the weather data, this is not part of the 5 day forecast API call so needs to be separate
-        current_url = f"https://api.openweathermap.org/data/2.5/weather?lat={LAT}&lon={LON}&appid={API_KEY}&units=imperial"
-        current_resp = requests.get(current_url)
-        current_resp.raise_for_status()
-        current_data = current_resp.json()
-
-        current_date = datetime.fromtimestamp(current_data["dt"]).strftime("%Y-%m-%d")
-        current_weather = {
-            "type": "weather",
-            "date": current_date,
-            "status": current_data["weather"][0]["description"],
-            "high_temp": current_data["main"]["temp_max"],
-            "low_temp": current_data["main"]["temp_min"],
-            "lat": LAT,
-            "lon": LON
-        }
-        # Insert or print for debugging
-        logging.info(f"Current weather: {current_weather}")
-        collection.insert_one(current_weather)
-        
-       
-        logging.info("Weather data successfully inserted into MongoDB.")
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Failed to fetch weather data: {e}")
-    except KeyError as e:
-        logging.error(f"Unexpected data format: {e}")
+        source = WeatherForecastSource(locations)
+        stats = run_pipeline(source)
+        stats["failed_locations"] = len(source.errors)
+        stats["errors"] = {f"{lat},{lon}": str(error) for (lat, lon), error in source.errors.items()}
+        if source.errors:
+            logging.error(f"Failed to fetch weather for {len(source.errors)} of {len(locations)} locations: "
+                          f"{stats['errors']}")
+        if stats["counts"]["failed"]:
+            logging.error("Failed to insert data into MongoDB.")
+        elif stats["counts"]["buffered"]:
+            logging.warning("Weather data buffered locally, it is written on the next run.")
+        elif not source.errors:
+            logging.info("Weather data successfully inserted into MongoDB.")
+        return stats
     except Exception as e:
-        logging.error(f"Failed to insert data into MongoDB: {e}")
\ No newline at end of file
+        logging.error(f"Failed to insert data into MongoDB: {e}")